@@ -0,0 +1,141 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+''' Images, loaded once and shared (see AssetManager).
+Images can be preloaded from a bundle file of raw pixels (faster to read than decoding pngs), made with:
+    python assets.py [--out FILE] [--workers N]
+The bundle holds the images in DIRS. Images changed since the bundle was made are decoded from their pngs. '''
+
+import os
+import sys
+import json
+import struct
+import pygame
+import utility
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+if __name__ == '__main__':
+    import assets
+    assets.write_bundle(sys.argv[1:])
+    sys.exit()
+
+DIRS = ['img/char', 'img/envir', 'img/envir/fauna', 'img/envir/flora', 'img/envir/tiles', 'img/hud', 'img/item', 'img/structure'] # preloaded
+BUNDLE_FILE = 'img/images.bundle' # see write_bundle
+BUNDLE_MAGIC = b'KIMG'
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct('<4sHI') # magic, version, length of json index
+BUNDLE_FORMAT = 'RGBA' # pixel format of images in the bundle
+DEF_WORKERS = min(8, os.cpu_count() or 1) # threads decoding pngs
+
+class AssetManager(object):
+    ''' Loads each image once (by path, e.g. 'img/envir/grass0.png') and shares it between every object using it.
+    Flipped and scaled variants are made once and shared too, so a thousand trees use a few Surfaces.
+    Shared images must not be drawn on (copy them first). '''
+    def __init__(self):
+        self.images = {} # maps path to Surface, as loaded
+        self.variants = {} # maps (path, flip, size) to Surface (see get)
+        self.load_time = 0 # in seconds, spent preloading (see preload)
+        self.bundled = 0 # number of images preloaded from a bundle
+
+    def __len__(self):
+        return len(self.images)
+
+    def __contains__(self, path):
+        return path in self.images
+
+    def load(self, path):
+        ''' Returns image at path, loading it the first time '''
+        if path not in self.images: self.images[path] = utility.load_image(path)
+        return self.images[path]
+
+    def get(self, path, flip=False, size=None):
+        ''' Returns image at path (shared pygame.Surface)
+        flip - bool, flip the image horizontally
+        size - (width, height) to scale the image to, None for its own size '''
+        if size != None: size = (int(size[0]), int(size[1]))
+        key = (path, flip, size)
+        if key not in self.variants:
+            img = self.load(path)
+            if size != None and size != img.get_size(): img = pygame.transform.scale(img, size)
+            if flip: img = pygame.transform.flip(img,1,0)
+            self.variants[key] = img
+        return self.variants[key]
+
+    def preload(self, paths, bundle=None, workers=DEF_WORKERS):
+        ''' load images at paths (e.g., from find_images). Images are read from bundle (path to a bundle file,
+        see write_bundle) if it has them, the rest are decoded on workers threads (pygame.image.load releases the GIL)
+        and converted for the display on this thread '''
+        start = perf_counter()
+        paths = [p for p in paths if p not in self.images]
+        if bundle != None and os.path.exists(bundle):
+            for path, img in read_bundle(bundle, paths).items(): self.images[path] = img.convert_alpha()
+            self.bundled = len([p for p in paths if p in self.images])
+            paths = [p for p in paths if p not in self.images]
+        for path, img in zip(paths, decode(paths, workers)): self.images[path] = img.convert_alpha()
+        self.load_time += perf_counter() -start
+
+    def get_surfaces(self):
+        ''' Returns list of distinct Surfaces held (images and variants) '''
+        return list({id(img): img for img in list(self.images.values()) +list(self.variants.values())}.values())
+
+    def nbytes(self):
+        ''' Returns memory used by images and variants (in bytes) '''
+        return sum(img.get_width()*img.get_height()*img.get_bytesize() for img in self.get_surfaces())
+
+
+def find_images(dirs):
+    ''' Returns sorted list of paths of png images in dirs (list of directories, not searched recursively) '''
+    paths = []
+    for d in dirs:
+        paths += [f'{d}/{name}' for name in os.listdir(d) if name.endswith('.png')]
+    return sorted(paths)
+
+def decode(paths, workers=DEF_WORKERS):
+    ''' Returns list of images (Surfaces, not converted for the display) decoded from pngs at paths '''
+    if workers <= 1 or len(paths) <= 1: return [pygame.image.load(path) for path in paths]
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(pygame.image.load, paths))
+
+def read_bundle(filename, paths=None):
+    ''' Returns dict mapping path to image (Surface, not converted for the display) for images in a bundle file
+    that haven't changed since it was made (only those in paths, a list, if given) '''
+    with open(filename, 'rb') as file:
+        data = file.read()
+    magic, version, length = BUNDLE_HEADER.unpack_from(data)
+    if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION: return {}
+    index = json.loads(data[BUNDLE_HEADER.size:BUNDLE_HEADER.size +length])
+    start = BUNDLE_HEADER.size +length
+    images = {}
+    for path in (paths if paths != None else index.keys()):
+        if path not in index or not os.path.exists(path): continue
+        w, h, mtime, offset = index[path]
+        if os.path.getmtime(path) != mtime: continue # changed
+        offset += start
+        images[path] = pygame.image.frombuffer(data[offset:offset +w*h*len(BUNDLE_FORMAT)], (w, h), BUNDLE_FORMAT)
+    return images
+
+def write_bundle(args):
+    ''' write a bundle file of the images in DIRS: BUNDLE_HEADER, json index {path: [width, height, mtime, offset]},
+    then each image's pixels (BUNDLE_FORMAT)
+    args (command line):
+        --out FILE - bundle file (DEFAULT: BUNDLE_FILE)
+        --workers N - threads decoding pngs (DEFAULT: DEF_WORKERS) '''
+    filename = BUNDLE_FILE
+    if '--out' in args: filename = args[args.index('--out')+1]
+    workers = DEF_WORKERS
+    if '--workers' in args: workers = int(args[args.index('--workers')+1])
+    paths = find_images(DIRS)
+    index, pixels, offset = {}, [], 0
+    for path, img in zip(paths, decode(paths, workers)):
+        w, h = img.get_size()
+        pixels.append(pygame.image.tobytes(img, BUNDLE_FORMAT))
+        index[path] = [w, h, os.path.getmtime(path), offset]
+        offset += len(pixels[-1])
+    index = json.dumps(index).encode()
+    with open(filename+'.tmp', 'wb') as file:
+        file.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(index)))
+        file.write(index)
+        file.write(b''.join(pixels))
+    os.replace(filename+'.tmp', filename)
+    print(f'wrote {len(paths)} images to {filename} ({(offset +len(index))/1024:.0f} KiB)')
@@ -0,0 +1,199 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+''' Frame time benchmarks for draw_level (runs offscreen with the dummy video driver)
+Builds a seeded world, then renders frames for every combination of zoom, number of light sources, and object density.
+Reports p50/p95/p99 times for each phase of draw_level (see main.perf) and surfaces allocated per frame.
+usage:
+    python bench.py [--frames N] [--seed N] [--zooms 0.5,1,2] [--lights 0,8,32] [--densities 1,2,4]
+                    [--out FILE] [--compare FILE] [--tolerance 0.25] [--native] [--dirty-rects]
+    python bench.py --memory [N] [--seed N]
+    python bench.py --assets [--densities 1,2,4] [--seed N]
+    --out saves the results as a JSON baseline, --compare checks the results against a baseline
+    (exits with status 1 if any phase is slower than the baseline by more than the tolerance)
+    --native draws at the art's resolution (see main.NATIVE_RENDER)
+    --dirty-rects redraws only what changed (see main.DIRTY_RECTS), frames of a still world cost little more than comparing
+    --memory compares memory used by N generated chunks (DEF_MEMORY_CHUNKS) stored as dicts of lists and in a chunks.ChunkStore
+    --assets reports images (see main.images) and how many Surfaces objects share for each density '''
+
+import os
+import sys
+import json
+import tracemalloc
+import random
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+import numpy
+import main
+import generate
+import profiler
+import chunks
+import sky
+
+DEF_FRAMES = 120 # frames timed for each configuration
+WARMUP_FRAMES = 10 # frames drawn (and not timed) before timing each configuration
+DEF_SEED = 0
+DEF_LIGHTS = [0, 8, 32] # number of light sources
+DEF_DENSITIES = [1, 2, 4] # multiple of the number of objects in a generated world
+DEF_TOLERANCE = .25 # fraction a phase can be slower than the baseline before it's a regression
+MIN_REGRESSION = .2 # in ms, smaller changes are never regressions (timer noise)
+PERCENTILES = [50, 95, 99]
+DEF_MEMORY_CHUNKS = generate.WORLD_SIZE # chunks generated for --memory (the whole world)
+
+def build_world(seed, density=1):
+    ''' generate a world with generate.generate_world and generate.create_objects and make it main's world.
+    density - int, number of times objects are created for each chunk '''
+    random.seed(seed)
+    numpy.random.seed(seed)
+    main.chunk_data = generate.generate_world()
+    main.scroll = main.controller.x = start_scroll()
+    objs = [[] for i in range(5)]
+    for i in range(density):
+        for l, new in zip(objs, generate.create_objects(main.chunk_data, main.scroll)):
+            if i == 0 or l is not objs[2]: l.extend(new) # only create people once
+    main.bg_objs, main.interactable_bg_objs, main.playable_objs, main.fg_objs, main.interactable_fg_objs = objs
+    main.spatial_index.rebuild(main.interactable_bg_objs +main.interactable_fg_objs +main.playable_objs)
+    main.lights.rebuild(main.interactable_bg_objs +main.interactable_fg_objs)
+    main.animals.rebuild(main.interactable_fg_objs)
+    main.people.rebuild(main.playable_objs)
+    main.chunk_cache.clear()
+    main.clouds = sky.CloudLayer(generate.world_seed, generate.WORLD_SIZE, main.RENDER_DISTANCE)
+
+def start_scroll():
+    ''' Returns scroll for the starting camp (same as main) '''
+    for c,size in generate.continent_sizes.items():
+        if 'north' in generate.CONTINENTS[c] and 'west' in generate.CONTINENTS[c]: continent_size = size
+    return (generate.WORLD_SIZE//4 -generate.ocean_sizes['artic']//2 -continent_size//2) *main.CHUNK_SIZE
+
+def add_lights(n):
+    ''' add n light sources (campfires) spread across the widest (most zoomed out) view '''
+    width = main.SCREEN_WIDTH/main.MIN_ZOOM
+    for i in range(n):
+        x = main.scroll +main.SCREEN_WIDTH//2 -width//2 +width*(i+.5)/n
+        main.interactable_bg_objs.append(generate.create_structure('campfire', int(x)))
+        main.spatial_index.add(main.interactable_bg_objs[-1])
+        main.lights.add(main.interactable_bg_objs[-1])
+
+def run_config(zoom, lights, density, frames, seed):
+    ''' Returns dict mapping phase name to {'p50': ms, 'p95': ms, 'p99': ms} and 
+    counter names (e.g., 'surfaces' allocated) to their average per frame '''
+    build_world(seed, density)
+    add_lights(lights)
+    main.zoom = zoom
+    main.time = main.SECONDS_PER_DAY*3/4 # night, so lighting is representative
+    for i in range(WARMUP_FRAMES): main.draw_level()
+    main.perf.reset()
+    for i in range(frames):
+        main.draw_level()
+        main.perf.end_frame()
+
+    results = {}
+    phases = [p for p in main.perf.frames[0].keys() if p not in profiler.COUNTERS]
+    for p in phases:
+        times = [f.get(p, 0) for f in main.perf.frames]
+        results[p] = {f'p{q}': round(float(t),4) for q,t in zip(PERCENTILES, numpy.percentile(times, PERCENTILES))}
+    for c in profiler.COUNTERS:
+        results[c] = sum(f.get(c, 0) for f in main.perf.frames)/len(main.perf.frames)
+    return results
+
+def measure_memory(n, seed):
+    ''' Returns dict mapping chunk data layout ('dict', 'store') to bytes allocated to hold n chunks 
+    (the n chunks around the starting camp, same chunk data for both layouts) '''
+    generate.generate_world(seed)
+    n = min(n, generate.WORLD_SIZE)
+    lower = min(max(start_scroll()//main.CHUNK_SIZE -n//2, -generate.WORLD_SIZE//2), generate.WORLD_SIZE//2 -n)
+    data = [generate.generate_lazy_chunk(c) for c in range(lower, lower +n)]
+    results = {}
+    for layout in ('dict', 'store'):
+        tracemalloc.start()
+        copy = json.loads(json.dumps(data)) # fresh lists and strings for each layout (freed for the store)
+        copy = [{k: [tuple(t) for t in v] if k in chunks.ENTITY_LISTS else v for k,v in chunk.items()} for chunk in copy]
+        if layout == 'dict': store = {c: chunk for c,chunk in zip(range(lower, lower +n), copy)}
+        else:
+            store = chunks.ChunkStore(-generate.WORLD_SIZE//2, generate.WORLD_SIZE//2)
+            for c,chunk in zip(range(lower, lower +n), copy): store.add(c, chunk)
+        del copy
+        results[layout] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del store
+    return results
+
+def measure_assets(density, seed):
+    ''' Returns dict with the number of objects, distinct Surfaces they're drawn with (obj.img), 
+    images loaded, Surfaces held by main.images (images and variants) and their memory (in bytes) '''
+    build_world(seed, density)
+    objs = main.bg_objs +main.interactable_bg_objs +main.playable_objs +main.fg_objs +main.interactable_fg_objs
+    return {'objects': len(objs), 'object_surfaces': len({id(o.img) for o in objs}), 'images': len(main.images), 
+        'surfaces': len(main.images.get_surfaces()), 'bytes': main.images.nbytes()}
+
+def compare(results, baseline, tolerance):
+    ''' Returns list of strings describing regressions from baseline '''
+    regressions = []
+    for config, phases in results.items():
+        if config not in baseline: continue
+        for p, stats in phases.items():
+            if p not in baseline[config]: continue
+            old = baseline[config][p]
+            if p in profiler.COUNTERS:
+                if p == 'surfaces' and stats > old +.5: regressions.append(f'{config} surfaces: {old:.1f} -> {stats:.1f} per frame')
+                continue
+            for q, t in stats.items():
+                if t > old[q]*(1+tolerance) and t -old[q] > MIN_REGRESSION:
+                    regressions.append(f'{config} {p} {q}: {old[q]:.2f} -> {t:.2f} ms')
+    return regressions
+
+def get_arg(args, name, default, type=str):
+    if name in args: return type(args[args.index(name)+1])
+    return default
+
+def get_list(args, name, default, type=float):
+    if name in args: return [type(v) for v in args[args.index(name)+1].split(',')]
+    return default
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if '--memory' in args:
+        i = args.index('--memory')
+        n = DEF_MEMORY_CHUNKS
+        if i+1 < len(args) and args[i+1].isdigit(): n = int(args[i+1])
+        memory = measure_memory(n, get_arg(args, '--seed', DEF_SEED, int))
+        for layout, size in memory.items():
+            print(f'{layout:<6} {min(n, generate.WORLD_SIZE)} chunks: {size/1024:9.1f} KiB ({size/n:7.1f} bytes/chunk)')
+        sys.exit()
+    if '--assets' in args:
+        for density in get_list(args, '--densities', DEF_DENSITIES, int):
+            r = measure_assets(density, get_arg(args, '--seed', DEF_SEED, int))
+            print(f'density={density:<3} {r["objects"]:5} objects drawn with {r["object_surfaces"]:4} Surfaces | ' \
+                f'{r["images"]} images, {r["surfaces"]} Surfaces with variants: {r["bytes"]/1024:.1f} KiB')
+        sys.exit()
+    frames = get_arg(args, '--frames', DEF_FRAMES, int)
+    seed = get_arg(args, '--seed', DEF_SEED, int)
+    zooms = get_list(args, '--zooms', [main.MIN_ZOOM, 1, main.MAX_ZOOM])
+    lights = get_list(args, '--lights', DEF_LIGHTS, int)
+    densities = get_list(args, '--densities', DEF_DENSITIES, int)
+    tolerance = get_arg(args, '--tolerance', DEF_TOLERANCE, float)
+    main.perf.track_surfaces()
+
+    results = {}
+    for zoom in zooms:
+        for n in lights:
+            for density in densities:
+                config = f'zoom={zoom:g} lights={n} density={density}'
+                results[config] = run_config(zoom, n, density, frames, seed)
+                r = results[config]
+                print(f'{config:<32} frame p50 {r["frame"]["p50"]:6.2f}ms p95 {r["frame"]["p95"]:6.2f}ms ' \
+                    f'p99 {r["frame"]["p99"]:6.2f}ms | ' + \
+                    ' '.join(f'{p} {r[p]["p50"]:.2f}' for p in r if p != 'frame' and p not in profiler.COUNTERS) + \
+                    f' | surfaces {r["surfaces"]:.1f}')
+
+    if '--out' in args:
+        meta = {'frames': frames, 'seed': seed, 'screen': [main.SCREEN_WIDTH, main.SCREEN_HEIGHT], 'native': main.NATIVE_RENDER, 'dirty_rects': main.DIRTY_RECTS}
+        data = {'meta': meta, 'results': results}
+        with open(args[args.index('--out')+1], 'w') as file:
+            json.dump(data, file, indent=1)
+    if '--compare' in args:
+        with open(args[args.index('--compare')+1]) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, tolerance)
+        for r in regressions: print('REGRESSION', r)
+        if regressions: sys.exit(1)
+        print('no regressions')
@@ -0,0 +1,98 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import pygame
+import utility
+from collections import OrderedDict
+
+LAYERS = ['ground', 'trees', 'grass', 'rocks']
+DECOR_LAYERS = LAYERS[1:] # drawn from tile objects (see get_objects)
+
+class ChunkLayerCache(object):
+    ''' Pre-rendered layers for each chunk, so a chunk's ground and static decor take one blit each:
+        ground - ground tiles (from chunk data), opaque
+        trees - tile objects in main.interactable_bg_objs
+        grass - tile objects in main.fg_objs
+        rocks - tile objects in main.interactable_fg_objs
+    Decor layers are drawn from a chunk's tile objects (objects with a tile, see obj.Object), in place of them
+    (where the first of them is in its list, a chunk's tile objects are created together) so objects are drawn
+    in the same order. They must be invalidated when they change (e.g., a tree is cut down or the chunk is loaded/unloaded).
+    Layers are rendered the first time they're drawn and the least recently drawn are dropped
+    when the cache uses more than budget bytes (budget should fit the layers of every visible chunk). '''
+    def __init__(self, budget):
+        self.budget = budget # in bytes
+        self.entries = OrderedDict() # maps (chunk, layer) to (Surface or None if empty, (x, y) world position), least recently drawn first
+        self.size = 0 # in bytes
+
+    def draw(self, surface, scroll, surf_size, layer, chunks):
+        ''' draw layer of chunks (iterable of chunk numbers). Returns number of Surfaces drawn '''
+        drawn = 0
+        for chunk in chunks:
+            img, pos = self.get(chunk, layer)
+            if img == None: continue
+            x, y = utility.zoom_transform(surf_size, pos)
+            surface.blit(img, (x -scroll, y))
+            drawn += 1
+        return drawn
+
+    def get(self, chunk, layer):
+        key = (chunk, layer)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        from main import perf
+        perf.count('bakes')
+        if layer == 'ground': entry = self.render_ground(chunk)
+        else: entry = self.render_decor(chunk, layer)
+        self.entries[key] = entry
+        self.size += get_size(entry[0])
+        while self.size > self.budget and len(self.entries) > 1: self.drop(next(iter(self.entries)))
+        return entry
+
+    def drop(self, key):
+        if key in self.entries: self.size -= get_size(self.entries.pop(key)[0])
+
+    def invalidate(self, chunk, layers=DECOR_LAYERS):
+        ''' re-render layers of chunk the next time they're drawn '''
+        for layer in layers: self.drop((chunk, layer))
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def render_ground(self, chunk):
+        ''' Returns (Surface, (x, y)) of the chunk's ground tiles, (None, None) if it has no ground (e.g., ocean) '''
+        from main import chunk_data, images, TILE_MASK, TILE_SIZE, CHUNK_SIZE, GROUND_Y
+        if chunk not in chunk_data: return None, None
+        tiles = chunk_data[chunk]['tiles']
+        if not any(tiles): return None, None
+        img = pygame.Surface((CHUNK_SIZE, TILE_SIZE*2)).convert()
+        img.fill((0,0,0))
+        for i,tile in enumerate(tiles):
+            if not tile: continue # no ground (e.g., ocean)
+            tile_img = images.get(f'img/envir/tiles/{tile}.png')
+            img.blit(tile_img, (TILE_SIZE*i, 0))
+            img.blit(tile_img, (TILE_SIZE*i, TILE_SIZE))
+            img.blit(TILE_MASK, (TILE_SIZE*i, TILE_SIZE))
+        return img, (chunk*CHUNK_SIZE, GROUND_Y)
+
+    def render_decor(self, chunk, layer):
+        ''' Returns (Surface, (x, y)) of the chunk's tile objects in layer, (None, None) if there aren't any '''
+        objs = [o for o in get_objects(layer) if o.tile != None and o.chunk == chunk]
+        if not objs: return None, None
+        rect = pygame.Rect(objs[0].x, objs[0].y, *objs[0].img.get_size())
+        rect.unionall_ip([pygame.Rect(o.x, o.y, *o.img.get_size()) for o in objs])
+        img = pygame.Surface(rect.size, pygame.SRCALPHA)
+        for o in objs: img.blit(o.img, (o.x -rect.x, o.y -rect.y))
+        return img, rect.topleft
+
+
+def get_objects(layer):
+    ''' Returns list of objects (main.interactable_bg_objs, fg_objs or interactable_fg_objs) a decor layer is drawn from '''
+    import main
+    return {'trees': main.interactable_bg_objs, 'grass': main.fg_objs, 'rocks': main.interactable_fg_objs}[layer]
+
+def get_size(img):
+    ''' Returns memory used by a Surface (in bytes) '''
+    if img == None: return 0
+    return img.get_width()*img.get_height()*img.get_bytesize()
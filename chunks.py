@@ -0,0 +1,174 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import numpy
+import threading
+from sizes import TILES_PER_CHUNK
+
+TILE_LAYERS = ['tiles', 'trees', 'grass', 'rocks'] # lists of png names, one for each tile
+ENTITY_LISTS = ['animals', 'structures', 'people', 'items'] # lists of ('name', x_pos, ...) tuples
+NO_ENTITIES = () # read for entity lists a chunk doesn't have (shared, so reading doesn't store anything)
+
+class Registry(object):
+    ''' maps names (e.g., 'spruce_tree1') to small integer ids and back. id 0 is always '' (nothing) '''
+    def __init__(self, names=['']):
+        self.names = list(names)
+        self.ids = {name: i for i,name in enumerate(self.names)}
+        self.lock = threading.Lock() # names can be registered while saving (on save.AutoSaver's thread)
+
+    def get_id(self, name):
+        ''' Returns id for name (registers new names) '''
+        try: return self.ids[name]
+        except KeyError:
+            with self.lock:
+                if name in self.ids: return self.ids[name]
+                if len(self.names) > numpy.iinfo(ChunkStore.DTYPE).max: raise OverflowError('too many names in Registry')
+                self.names.append(name)
+                self.ids[name] = len(self.names) -1
+                return self.ids[name]
+
+
+class ChunkStore(object):
+    ''' Compact chunk data for chunks lower to upper.
+    Tile layers and biomes are stored as ids (see Registry) in numpy arrays indexed [chunk, tile],
+    entity lists only for chunks that have them.
+    Reads like chunk_data (a dict {chunk_number : {<chunk data>}}), e.g. chunk_data[chunk]['trees'].
+    Tile layers are returned as new lists, assign a whole list to change one (chunk_data[chunk]['trees'] = trees).
+    Entity lists are read as stored (an empty tuple if the chunk has none), add to one with add_entity
+    or assign a whole list.
+    Chunks that haven't been added are made with generate(chunk_num) the first time they're accessed.
+    Chunks that change after they're added are dirty (need saving, see save.py). '''
+    DTYPE = numpy.uint8
+
+    def __init__(self, lower, upper, generate=None, registry=None):
+        self.lower, self.upper = lower, upper
+        self.generate = generate
+        self.registry = registry if registry != None else Registry()
+        self.layers = {layer: numpy.zeros((upper -lower, TILES_PER_CHUNK), self.DTYPE) for layer in TILE_LAYERS}
+        self.biomes = numpy.zeros(upper -lower, self.DTYPE)
+        self.added = numpy.zeros(upper -lower, bool) # whether each chunk has been generated/added
+        self.entities = {} # maps chunk number to {entity list name: list} (only for chunks with entities)
+        self.dirty = set() # chunk numbers changed since they were generated/loaded/saved
+
+    def __contains__(self, chunk_num):
+        return self.lower <= chunk_num < self.upper
+
+    def __getitem__(self, chunk_num):
+        if chunk_num not in self: raise KeyError(chunk_num)
+        if not self.added[chunk_num -self.lower]:
+            if self.generate == None: raise KeyError(chunk_num)
+            self.add(chunk_num, self.generate(chunk_num))
+        return ChunkView(self, chunk_num)
+
+    def __setitem__(self, chunk_num, chunk):
+        ''' add chunk (a dict of chunk data) to the store (replaces the chunk) '''
+        self.add(chunk_num, chunk)
+        self.dirty.add(chunk_num)
+
+    def add(self, chunk_num, chunk):
+        ''' add chunk (a dict of chunk data) without making it dirty (e.g., chunks generated or loaded from a save) '''
+        if chunk_num not in self: raise KeyError(chunk_num)
+        view = ChunkView(self, chunk_num)
+        for key, value in chunk.items(): view[key] = value
+        self.added[chunk_num -self.lower] = True
+        self.dirty.discard(chunk_num)
+
+    def add_entity(self, chunk_num, key, entity):
+        ''' add entity (('name', x_pos) tuple) to entity list key (e.g., 'structures') of a chunk, making it dirty '''
+        if key not in ENTITY_LISTS: raise KeyError(key)
+        self[chunk_num] # generate the chunk if it hasn't been added
+        self.entities.setdefault(chunk_num, {}).setdefault(key, []).append(entity)
+        self.dirty.add(chunk_num)
+
+    def mark_dirty(self, chunk_num):
+        if chunk_num in self: self.dirty.add(chunk_num)
+
+    def __len__(self):
+        return int(self.added.sum())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, chunk_num, default=None):
+        if chunk_num in self: return self[chunk_num]
+        return default
+
+    def keys(self):
+        ''' Returns chunk numbers of added chunks '''
+        return [int(i) +self.lower for i in numpy.flatnonzero(self.added)]
+
+    def values(self):
+        return [self[c] for c in self.keys()]
+
+    def items(self):
+        return [(c, self[c]) for c in self.keys()]
+
+    def to_dict(self, chunk_num):
+        ''' Returns a copy of one chunk's data as a dict (same as generate.generate_chunk) '''
+        view = self[chunk_num]
+        chunk = {key: view[key] for key in ['biome'] +TILE_LAYERS}
+        lists = self.entities.get(chunk_num, {})
+        for key in ENTITY_LISTS: chunk[key] = list(lists.get(key, []))
+        return chunk
+
+    def nbytes(self):
+        ''' Returns approximate memory used (in bytes) by tile arrays and entity lists '''
+        import sys
+        total = sum(a.nbytes for a in self.layers.values()) +self.biomes.nbytes +self.added.nbytes
+        for lists in self.entities.values():
+            total += sys.getsizeof(lists) +sum(sys.getsizeof(l) +sum(sys.getsizeof(t) for t in l) for l in lists.values())
+        return total
+
+
+class ChunkView(object):
+    ''' dict-like view of one chunk in a ChunkStore (see ChunkStore) '''
+    def __init__(self, store, chunk_num):
+        self.store = store
+        self.chunk_num = chunk_num
+        self.i = chunk_num -store.lower
+
+    def __getitem__(self, key):
+        store = self.store
+        if key in store.layers:
+            names = store.registry.names
+            return [names[i] for i in store.layers[key][self.i].tolist()]
+        if key == 'biome': return store.registry.names[store.biomes[self.i]]
+        if key in ENTITY_LISTS: return store.entities.get(self.chunk_num, {}).get(key, NO_ENTITIES)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        store = self.store
+        if key in store.layers:
+            ids = numpy.array([store.registry.get_id(name) for name in value], store.DTYPE)
+            if (store.layers[key][self.i] == ids).all(): return
+            store.layers[key][self.i] = ids
+        elif key == 'biome': 
+            if store.biomes[self.i] == store.registry.get_id(value): return
+            store.biomes[self.i] = store.registry.get_id(value)
+        elif key in ENTITY_LISTS:
+            lists = store.entities.setdefault(self.chunk_num, {})
+            if lists.get(key, []) == list(value): 
+                if not lists: del store.entities[self.chunk_num]
+                return
+            if value: lists[key] = list(value)
+            else:
+                lists.pop(key, None)
+                if not lists: del store.entities[self.chunk_num]
+        else: raise KeyError(key)
+        store.dirty.add(self.chunk_num)
+
+    def __contains__(self, key):
+        return key in self.store.layers or key == 'biome' or key in ENTITY_LISTS
+
+    def get(self, key, default=None):
+        if key in self: return self[key]
+        return default
+
+    def keys(self):
+        return ['biome'] +TILE_LAYERS +ENTITY_LISTS
+
+    def copy(self):
+        return self.store.to_dict(self.chunk_num)
+
+    def __repr__(self):
+        return repr(self.store.to_dict(self.chunk_num))
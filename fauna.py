@@ -0,0 +1,153 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import numpy
+
+STATES = ['idle', 'wander', 'flee'] # Animal.state, stored as index
+IDLE, WANDER, FLEE = range(len(STATES))
+FACING = {'right': 1, 'left': -1} # Animal.facing, stored as direction
+FIELDS = {'x': numpy.float64, 'speed': numpy.float64, 'state': numpy.int8, 'facing': numpy.int8, 'animated': bool,
+    'wander_num': numpy.int32, 'wander_time': numpy.int32, 'flee_obj': numpy.int32} # stored for each Animal
+MIN_CAPACITY = 64 # animals the arrays hold before growing
+WANDER_PROB = .05 # probability an animal that isn't wandering starts, checked once per second
+WANDER_STEP = (1, 2) # range of wander_num added each tick while wandering (wandering ends at wander_time)
+
+class AnimalSystem(object):
+    ''' Every Animal's position and behavior (see FIELDS) in arrays (struct of arrays), updated for all animals at once
+    each tick with numpy (see update). Animals (obj.Animal) are views of a slot of the arrays, for drawing and
+    interaction (e.g., Persons startling them with set_state). Animals must be added and removed like
+    spatial.SpatialIndex's objects, which finds them by position with query_range instead of bucketing them.
+    states:
+        idle - stands still
+        wander - once per second, animals not moving start moving (WANDER_PROB) left or right,
+            and stop after wander_time (counting up by WANDER_STEP each tick)
+        flee - runs from flee_obj (a Person), calming down (wander) with probability (1 -startle_prob)/FPS each tick
+            once it's farther than flee_obj's startle_dis '''
+    def __init__(self):
+        self.arrays = {name: numpy.zeros(0, dtype) for name, dtype in FIELDS.items()}
+        self.width = numpy.zeros(0, numpy.int32) # for centers and x extents (see query_range)
+        self.animals = [] # maps slot to Animal (None for unused slots, which are idle)
+        self.free = [] # unused slots
+        self.count = 0 # number of animals
+        self.targets = [] # objects animals flee from (flee_obj is an index of this)
+        self.target_index = {} # maps id(target) to index in targets
+        self.grow(MIN_CAPACITY)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, obj):
+        ''' add obj if it's an Animal (its fields are moved into the arrays) '''
+        from obj import Animal
+        if type(obj) != Animal or obj.system != None: return
+        if not self.free: self.grow(len(self.animals)*2)
+        slot = self.free.pop()
+        values = {name: obj.__dict__.pop('_'+name) for name in FIELDS}
+        obj.system, obj.slot = self, slot
+        for name, value in values.items(): self.set(slot, name, value)
+        self.width[slot] = obj.width
+        self.animals[slot] = obj
+        self.count += 1
+
+    def remove(self, obj):
+        ''' remove obj (its fields are moved back onto it) '''
+        if getattr(obj, 'system', None) is not self: return
+        slot = obj.slot
+        values = {name: self.get(slot, name) for name in FIELDS}
+        obj.system, obj.slot = None, None
+        for name, value in values.items(): setattr(obj, name, value)
+        self.clear(slot)
+        self.animals[slot] = None
+        self.free.append(slot)
+        self.count -= 1
+
+    def rebuild(self, objs):
+        ''' remove every animal and add those in objs '''
+        for animal in self.animals:
+            if animal != None: self.remove(animal)
+        for obj in objs: self.add(obj)
+
+    def grow(self, capacity):
+        ''' make room for capacity animals '''
+        old = len(self.animals)
+        for name in FIELDS: self.arrays[name] = numpy.resize(self.arrays[name], capacity)
+        self.width = numpy.resize(self.width, capacity)
+        self.animals += [None]*(capacity -old)
+        self.free += range(capacity -1, old -1, -1) # lowest slots used first
+        self.clear(slice(old, capacity))
+
+    def clear(self, slots):
+        ''' make slots unused (idle, so they're skipped by update, and at x NaN, so they're never found by query_range) '''
+        self.arrays['x'][slots] = numpy.nan
+        self.arrays['state'][slots] = IDLE
+        self.arrays['animated'][slots] = False
+        self.arrays['flee_obj'][slots] = -1
+
+    def get(self, slot, name):
+        ''' Returns an animal's field (see FIELDS) as Animal attributes are (e.g., state as a string) '''
+        value = self.arrays[name][slot]
+        if name == 'state': return STATES[value]
+        elif name == 'facing': return 'right' if value > 0 else 'left'
+        elif name == 'animated': return bool(value)
+        elif name == 'flee_obj': return self.targets[value] if value >= 0 else None
+        elif name in ('wander_num', 'wander_time'): return int(value)
+        return float(value)
+
+    def set(self, slot, name, value):
+        if name == 'state': value = STATES.index(value)
+        elif name == 'facing': value = FACING[value]
+        elif name == 'flee_obj': value = self.get_target(value)
+        self.arrays[name][slot] = value
+
+    def get_target(self, obj):
+        ''' Returns index of obj in targets (-1 for None), adding it if it's not there '''
+        if obj == None: return -1
+        if id(obj) not in self.target_index:
+            self.target_index[id(obj)] = len(self.targets)
+            self.targets.append(obj)
+        return self.target_index[id(obj)]
+
+    def update(self, ticks):
+        ''' update every animal one tick
+        ticks - number of ticks simulated (see World) '''
+        if not self.count: return
+        from main import FPS
+        x, speed, state, facing = self.arrays['x'], self.arrays['speed'], self.arrays['state'], self.arrays['facing']
+        animated, wander_num, flee = self.arrays['animated'], self.arrays['wander_num'], self.arrays['flee_obj']
+
+        # wander
+        if ticks%FPS == 0: # try to wander once per second
+            start = ((state == WANDER) & ~animated).nonzero()[0]
+            start = start[numpy.random.random(len(start)) < WANDER_PROB]
+            animated[start] = True
+            facing[start] = numpy.where(numpy.random.random(len(start)) < .5, 1, -1)
+        moving = (animated & (state == WANDER)).nonzero()[0]
+        if len(moving):
+            wander_num[moving] += numpy.random.randint(WANDER_STEP[0], WANDER_STEP[1]+1, len(moving))
+            self.set_wander(moving[wander_num[moving] >= self.arrays['wander_time'][moving]])
+            x[moving] += speed[moving]*facing[moving]
+
+        # flee
+        fleeing = (state == FLEE).nonzero()[0]
+        if len(fleeing):
+            targets = numpy.array([(t.x +t.width//2, t.startle_dis, t.startle_prob) for t in self.targets]).reshape(-1, 3)
+            t = targets[flee[fleeing]]
+            direction = numpy.sign(t[:,0] -(x[fleeing] +self.width[fleeing]//2)) # direction of flee object relative to animal
+            facing[fleeing] = numpy.where(direction > 0, -1, 1)
+            x[fleeing] -= direction*speed[fleeing] # run away!
+            away = numpy.abs(t[:,0] -(x[fleeing] +self.width[fleeing]//2)) > t[:,1] # got away!
+            self.set_wander(fleeing[away & (numpy.random.random(len(fleeing)) < (1 -t[:,2])/FPS)])
+        elif self.targets and not (flee >= 0).any(): self.targets, self.target_index = [], {} # none fleeing
+
+    def query_range(self, x1, x2):
+        ''' Returns list of Animals whose x extent overlaps x1 to x2 (in pixels, x2 not included), in slot order '''
+        x = self.arrays['x']
+        return [self.animals[i] for i in ((x < x2) & (x +self.width > x1)).nonzero()[0]]
+
+    def set_wander(self, slots):
+        ''' set animals (array of slots) to wander (see Animal.set_state) '''
+        self.arrays['state'][slots] = WANDER
+        self.arrays['wander_num'][slots] = 0
+        self.arrays['animated'][slots] = False
+        self.arrays['flee_obj'][slots] = -1
+
@@ -2,10 +2,20 @@
 # Created: 11/6/22
 
 import random
-import numpy
-import pygame
-import utility
 import obj
+import chunks
+import os
+import sys
+import json
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+
+if __name__ == '__main__':
+    # create_objects reads game variables with "from main import ...", which imports this module as generate,
+    # so bake from the importable generate module instead of from __main__
+    import generate
+    generate.bake(sys.argv[1:])
+    sys.exit()
 
 # for world generation
 WORLD_SIZE = 1200 # number of chunks
@@ -42,62 +52,80 @@ ROCK_PROB = .1
 LIGHT_SOURCES = ['campfire']
 HAS_INV = ['cave_entrance','log_cabin']
 STRUCT_INVENTORY_SIZE = 10
-CLOUDS_PER_CHUNK = 2
-CLOUD_PROB = .4
 ITEM_TO_TAGS = {'axe':['item','wood'], 'hammer':['item','build']}
 ITEM_ID_TO_VARIANTS = { # maps object to number of variants (for getting images and creating objects)
-                        'cloud':3, 'grass':2, 'rock':2, 'person':2, 'spruce_tree':3}
+                        'grass':2, 'rock':2, 'person':2, 'spruce_tree':3}
+
+# for baking whole worlds (see bake)
+BAKE_TASK_SIZE = 1024 # number of chunks generated by each task in the process pool
+
 
+def set_world_size(size):
+    ''' change WORLD_SIZE (and the sizes that depend on it). Call before generate_world '''
+    global WORLD_SIZE, OCEAN_CHUNKS, POLE_SIZE, CONTINENT_VAR, OCEAN_VAR
+    WORLD_SIZE = size
+    OCEAN_CHUNKS = WORLD_SIZE//3
+    POLE_SIZE = WORLD_SIZE//2//6
+    CONTINENT_VAR = (WORLD_SIZE-OCEAN_CHUNKS)//50
+    OCEAN_VAR = OCEAN_CHUNKS//10
 
-def get_var(var):
+
+def generate_lazy_chunk(chunk_num):
+    ''' Returns chunk data for a chunk generated the first time it's accessed (see generate_world) '''
+    return generate_chunk(chunk_num, get_biome(chunk_num), rng=get_chunk_rng(chunk_num))
+
+def get_var(var, rng=random):
     ''' get random variance (for generating world) '''
-    return random.randint(-var//2,var//2)
+    return rng.randint(-var//2,var//2)
+
+def get_chunk_rng(chunk_num):
+    ''' Returns a random.Random for generating a chunk, seeded by world_seed and the chunk number 
+    (so a chunk is the same no matter what order chunks are generated in) '''
+    return random.Random(f'{world_seed}/{chunk_num}')
 
-def generate_world():
+def generate_world(seed=None):
     ''' Generates a new game world.
-    Specifies sizes for continents and oceans 
-    and calls helper functions to generate the biomes and chunk data.
-    Returns a dict {chunk_number : {<chunk data>}} mapping chunk number (int) to a dict 
+    Specifies sizes for continents and oceans (from seed, random if None).
+    Chunks are generated the first time they're accessed (see generate_lazy_chunk).
+    Returns a chunks.ChunkStore (reads like a dict {chunk_number : {<chunk data>}}) mapping chunk number (int) to a dict 
     containing biome and object data for that chunk. 
     Keys for each chunk:
             biome - string, biome from BIOMES
             tiles, trees, grass, rocks - list of strings (png name for each tile); len = TILES_PER_CHUNK  (DEFAULT: [''*TILES_PER_CHUNK])
             animals, structures, people, items - list of tuples ('name', x_pos) representing objects (DEFAULT: [])
     '''
-    chunk_data = {}
+    global world_seed
+    if seed == None: seed = random.getrandbits(32)
+    world_seed = seed
+    rng = random.Random(seed)
 
     # assign number of chunks for each OCEAN 
     global ocean_sizes
-    ocean_sizes = {OCEANS['pole']: POLE_SIZE +get_var(OCEAN_VAR)}
+    ocean_sizes = {OCEANS['pole']: POLE_SIZE +get_var(OCEAN_VAR, rng)}
     ocean_chunks = OCEAN_CHUNKS//2 -ocean_sizes[OCEANS['pole']]//2 # for a each hemisphere
     # western OCEANS
-    ocean_sizes[OCEANS['southwest']] = ocean_chunks//2 +get_var(OCEAN_VAR) # south
+    ocean_sizes[OCEANS['southwest']] = ocean_chunks//2 +get_var(OCEAN_VAR, rng) # south
     ocean_sizes[OCEANS['northwest']] = ocean_chunks -ocean_sizes[OCEANS['southwest']] # north
     # eastern OCEANS
-    ocean_sizes[OCEANS['southeast']] = ocean_chunks//2 +get_var(OCEAN_VAR) # south
+    ocean_sizes[OCEANS['southeast']] = ocean_chunks//2 +get_var(OCEAN_VAR, rng) # south
     ocean_sizes[OCEANS['northeast']] = ocean_chunks -ocean_sizes[OCEANS['southeast']] # north
 
     # assign number of chunks for each CONTINENT
     global continent_sizes
-    continent_sizes = {REGION_TO_CONTINENTS['pole']: POLE_SIZE +get_var(CONTINENT_VAR)}
+    continent_sizes = {REGION_TO_CONTINENTS['pole']: POLE_SIZE +get_var(CONTINENT_VAR, rng)}
     land_chunks = WORLD_SIZE//2 -ocean_chunks -continent_sizes[REGION_TO_CONTINENTS['pole']]//2 # for a each hemisphere
     # nothern CONTINENTS
     north_continents = [c for c in CONTINENTS.keys() if 'north' in CONTINENTS[c]]
-    north_continents.pop(random.randint(0,len(north_continents)-1))
-    continent_sizes[north_continents[0]] = land_chunks//4 +get_var(CONTINENT_VAR) # west 
-    continent_sizes[north_continents[-1]] = land_chunks//4 +get_var(CONTINENT_VAR) # east 
+    north_continents.pop(rng.randint(0,len(north_continents)-1))
+    continent_sizes[north_continents[0]] = land_chunks//4 +get_var(CONTINENT_VAR, rng) # west 
+    continent_sizes[north_continents[-1]] = land_chunks//4 +get_var(CONTINENT_VAR, rng) # east 
     # southern CONTINENTS
     south_continents = [c for c in CONTINENTS.keys() if 'south' in CONTINENTS[c]]
-    south_continents.pop(random.randint(0,len(south_continents)-1))
+    south_continents.pop(rng.randint(0,len(south_continents)-1))
     continent_sizes[south_continents[0]] = land_chunks//2 -continent_sizes[north_continents[0]] # west
     continent_sizes[south_continents[-1]] = land_chunks//2 -continent_sizes[north_continents[-1]] # east
     
-    # generate starting continent
-    for c in continent_sizes.keys():
-        if 'north' in CONTINENTS[c] and 'west' in CONTINENTS[c]:
-            chunk_data = generate_continent(c)
-    
-    return chunk_data
+    return chunks.ChunkStore(-WORLD_SIZE//2, WORLD_SIZE//2, generate=generate_lazy_chunk)
 
 def generate_ocean(ocean):
     ''' Generates chunks for a new ocean
@@ -135,18 +163,14 @@ def generate_ocean(ocean):
     # south
     elif ocean == OCEANS['southwest']:
         lower = -WORLD_SIZE//4 +continent_sizes[REGION_TO_CONTINENTS['pole']]//2 
-        upper = -WORLD_SIZE//4 +continent_sizes[REGION_TO_CONTINENTS['pole']]//2 +ocean_sizes[OCEANS[OCEANS['southwest']]]//2 
+        upper = -WORLD_SIZE//4 +continent_sizes[REGION_TO_CONTINENTS['pole']]//2 +ocean_sizes[OCEANS['southwest']]//2 
     elif ocean == OCEANS['southeast']:
-        lower = -WORLD_SIZE//4 -continent_sizes[REGION_TO_CONTINENTS['pole']]//2 -ocean_sizes[OCEANS[OCEANS['southeast']]]//2 
+        lower = -WORLD_SIZE//4 -continent_sizes[REGION_TO_CONTINENTS['pole']]//2 -ocean_sizes[OCEANS['southeast']]//2 
         upper = -WORLD_SIZE//4 -continent_sizes[REGION_TO_CONTINENTS['pole']]//2  
 
     # generate chunks
     if lower < upper:
-        return {i: {
-            'biome':'ocean', # initialize chunks as empty ocean
-            'trees':[], 'grass':[], 'rocks':[], 
-            'animals':[], 'structures':[]} 
-            for i in range(lower, upper)} 
+        return {i: generate_chunk(i, 'ocean', rng=get_chunk_rng(i)) for i in range(lower, upper)} 
     else: raise NotImplementedError #TODO
 
 def generate_continent(continent):
@@ -163,7 +187,19 @@ def generate_continent(continent):
             tiles, trees, grass, rocks - list of strings (png name for each tile); len = TILES_PER_CHUNK  (DEFAULT: [''*TILES_PER_CHUNK])
             animals, structures, people, items - list of tuples ('name', x_pos) representing objects (DEFAULT: [])
         '''
-    # get correct bounds for chunk range being generated
+    lower, upper = get_continent_bounds(continent)
+
+    # select biomes and generate chunks
+    chunk_data = {}    
+    if lower < upper:
+        for chunk in range(lower,upper):
+            chunk_data[chunk] = generate_chunk(chunk, get_biome(chunk), rng=get_chunk_rng(chunk))
+    else: raise NotImplementedError #TODO
+    return chunk_data
+
+def get_continent_bounds(continent):
+    ''' Returns (lower, upper), range of chunk numbers of a continent 
+    (lower > upper if the continent passes the eastern equator) '''
     # south pole
     if continent == REGION_TO_CONTINENTS['pole']:
         lower = -WORLD_SIZE//4 -continent_sizes[REGION_TO_CONTINENTS['pole']]//2
@@ -186,19 +222,27 @@ def generate_continent(continent):
             upper = -WORLD_SIZE//4 -continent_sizes[REGION_TO_CONTINENTS['pole']]//2 -ocean_sizes[OCEANS['southeast']] 
             if lower < -WORLD_SIZE//2: lower += WORLD_SIZE # if continent passes eastern equator
 
-    # select biomes and generate chunks
-    chunk_data = {}    
-    if lower < upper:
-        for chunk in range(lower,upper):
-            if chunk in range(upper -(upper-lower)//2 -STARTING_CAMP_SIZE//2, upper -(upper-lower)//2 +STARTING_CAMP_SIZE//2):
-                world = generate_chunk(chunk, 'camp')
-            else:
-                world = generate_chunk(chunk, 'forest')
-            chunk_data[chunk] = world
-    else: raise NotImplementedError #TODO
-    return chunk_data
+    return lower, upper
+
+def get_starting_continent():
+    ''' Returns the continent with the starting camp (north west) '''
+    for c in continent_sizes.keys():
+        if 'north' in CONTINENTS[c] and 'west' in CONTINENTS[c]: start = c
+    return start
 
-def generate_chunk(chunk_num, biome):
+def get_biome(chunk_num):
+    ''' Returns the biome of a chunk (from the sizes of continents) '''
+    # starting camp, in the middle of the starting continent only
+    lower, upper = get_continent_bounds(get_starting_continent())
+    if chunk_num in range(upper -(upper-lower)//2 -STARTING_CAMP_SIZE//2, upper -(upper-lower)//2 +STARTING_CAMP_SIZE//2):
+        return 'camp'
+    for continent in continent_sizes.keys():
+        lower, upper = get_continent_bounds(continent)
+        if lower < upper and chunk_num in range(lower, upper): return 'forest'
+        if lower > upper and (chunk_num >= lower or chunk_num < upper): return 'forest' # continent passes eastern equator
+    return 'ocean'
+
+def generate_chunk(chunk_num, biome, rng=random):
     ''' generates 1 chunk (16 tiles) for a particular biome. 
     Returns a dict containing data for one newly generated chunk of a particular biome
     Keys for each chunk:
@@ -206,7 +250,7 @@ def generate_chunk(chunk_num, biome):
             tiles, trees, grass, rocks - list of strings (png name for each tile); len = TILES_PER_CHUNK  (DEFAULT: [''*TILES_PER_CHUNK])
             animals, structures, people, items - list of tuples ('name', x_pos) representing objects (DEFAULT: [])
 '''
-    from main import TILES_PER_CHUNK, PIXELS_PER_TILE, CHUNK_SIZE
+    from sizes import TILES_PER_CHUNK, PIXELS_PER_TILE, CHUNK_SIZE, PIXEL_SIZE # not from main, so chunks can be baked without the game
     chunk = {'biome':biome}
     tiles, grass, trees, rocks = [], [], [], [] # str (png name) for each tile
     animals, structures, people, items = [], [], [], [] # tup ('name', x_pos) for each object
@@ -217,14 +261,14 @@ def generate_chunk(chunk_num, biome):
             tiles.append('dirt')
             # grass
             if i not in (0,1,2,13,14,15):
-                grass_type = random.randint(0,ITEM_ID_TO_VARIANTS['grass']-1)
+                grass_type = rng.randint(0,ITEM_ID_TO_VARIANTS['grass']-1)
                 grass.append(f'grass{grass_type}')
             else: grass.append('')
             # trees
             trees.append('')
             # rocks
-            if random.random() < ROCK_PROB//2:
-                rock_type = random.randint(0,ITEM_ID_TO_VARIANTS['rock']-1)
+            if rng.random() < ROCK_PROB//2:
+                rock_type = rng.randint(0,ITEM_ID_TO_VARIANTS['rock']-1)
                 rocks.append(f'rock{rock_type}')
             else: rocks.append('')
 
@@ -240,6 +284,9 @@ def generate_chunk(chunk_num, biome):
             #items
             items.append(('hammer',chunk_num*CHUNK_SIZE +50))
 
+    elif biome == 'ocean':
+        tiles, grass, trees, rocks = ['']*TILES_PER_CHUNK, ['']*TILES_PER_CHUNK, ['']*TILES_PER_CHUNK, ['']*TILES_PER_CHUNK
+
     elif biome == 'forest':
         for i in range(TILES_PER_CHUNK):
             #tiles
@@ -247,20 +294,20 @@ def generate_chunk(chunk_num, biome):
             # grass
             grass.append('')
             # trees
-            if i%2 == 0 and random.random() < OAK_TREE_PROB:
-                tree_type = random.randint(0,ITEM_ID_TO_VARIANTS['spruce_tree']-1)
+            if i%2 == 0 and rng.random() < OAK_TREE_PROB:
+                tree_type = rng.randint(0,ITEM_ID_TO_VARIANTS['spruce_tree']-1)
                 trees.append(f'spruce_tree{tree_type}')
             else: trees.append('')
             # rocks
-            if random.random() < ROCK_PROB:
-                rock_type = random.randint(0,ITEM_ID_TO_VARIANTS['rock']-1)
+            if rng.random() < ROCK_PROB:
+                rock_type = rng.randint(0,ITEM_ID_TO_VARIANTS['rock']-1)
                 rocks.append(f'rock{rock_type}')
             else: rocks.append('')
         # animals
         for i in range(SMALL_ANIMALS_PER_CHUNK):
-            if random.random() < ANIMAL_PROB:
-                pixel = random.randint(i*TILES_PER_CHUNK//SMALL_ANIMALS_PER_CHUNK*PIXELS_PER_TILE, (i+1)*TILES_PER_CHUNK//SMALL_ANIMALS_PER_CHUNK*PIXELS_PER_TILE)
-                animals.append(('bunny', chunk_num*TILES_PER_CHUNK*PIXELS_PER_TILE +numpy.sign(chunk_num)*pixel))
+            if rng.random() < ANIMAL_PROB:
+                pixel = rng.randint(i*TILES_PER_CHUNK//SMALL_ANIMALS_PER_CHUNK*PIXELS_PER_TILE, (i+1)*TILES_PER_CHUNK//SMALL_ANIMALS_PER_CHUNK*PIXELS_PER_TILE)
+                animals.append(('bunny', chunk_num*CHUNK_SIZE +pixel*PIXEL_SIZE)) # pixel is in in-game pixels
     
     chunk.update({'tiles':tiles,'trees':trees,'grass':grass,'rocks':rocks,
         'animals':animals,'structures':structures,'people':people,'items':items})
@@ -269,7 +316,7 @@ def generate_chunk(chunk_num, biome):
 def create_item(item_id, x, path='img/item/', obj_class='object'):
     ''' create a new item (Item for held item or Object for inventory item)
     possible obj_class (class to use when creating objet): 'item', 'object' '''
-    from main import ANIMATION_DATABASE, GROUND_Y, FILENAME_TO_IMGS
+    from main import ANIMATION_DATABASE, GROUND_Y, images
     
     # default y position is resting on ground
     w, h = ANIMATION_DATABASE[item_id]
@@ -283,17 +330,13 @@ def create_item(item_id, x, path='img/item/', obj_class='object'):
     try: item_str = item_id+str(random.randint(0,ITEM_ID_TO_VARIANTS[item_id]-1)) 
     except: item_str = item_id
 
-    # if image has not already been loaded and saved, load it
-    if item_str not in FILENAME_TO_IMGS.keys(): FILENAME_TO_IMGS[item_str] = utility.load_image(path+item_str+'.png')
-    img = FILENAME_TO_IMGS[item_str]
-
-    if random.random() < .5: img = utility.flip_img(img) # randomize facing direction
+    img = images.get(path+item_str+'.png', flip=random.random() < .5) # randomize facing direction
 
     # create object
     try: tags = ITEM_TO_TAGS[item_id]
     except: tags = ['item']
     if obj_class == 'item':
-        sheet = utility.load_image(f'img/item/{item_id}_sheet.png')
+        sheet = images.get(f'img/item/{item_id}_sheet.png')
         return obj.Item(x, y, w, h, img, sheet, ANIMATION_DATABASE[f'{item_id}_sheet'], id=item_id, tags=tags)
     return obj.Object(x, y, w, h, img, id=item_id, tags=tags)
 
@@ -303,135 +346,177 @@ def create_structure(name, x, inventory={}, built=1):
         name - string, filename for Structure image
         x - x value of the CENTER of the the Structure
     returns Structure object'''
-    from main import ANIMATION_DATABASE, GROUND_Y, FILENAME_TO_IMGS
-    if name not in FILENAME_TO_IMGS.keys():
-        FILENAME_TO_IMGS[name] = utility.load_image(f'img/structure/{name}.png')
-    img = FILENAME_TO_IMGS[name]
+    from main import ANIMATION_DATABASE, GROUND_Y, images
+    img = images.get(f'img/structure/{name}.png')
     w, h = ANIMATION_DATABASE[name]
     tags = []
     if name in LIGHT_SOURCES: 
         tags.append('light')
-        structure = obj.Structure(x -w//2, GROUND_Y -h, w, h, img, animated=True, frames=5, \
+        structure = obj.Structure(x -w//2, GROUND_Y -h, w, h, img, name=name, animated=True, frames=5, \
             tags=tags, built=built)
     elif name in HAS_INV: 
-        structure = obj.Structure(x -w//2, GROUND_Y -h, w, h, img, \
+        structure = obj.Structure(x -w//2, GROUND_Y -h, w, h, img, name=name, \
             tags=tags, inventory=inventory, inventory_space=STRUCT_INVENTORY_SIZE, built=built)
-    else: structure = obj.Structure(x -w//2, GROUND_Y -h, w, h, img, tags=tags)
+    else: structure = obj.Structure(x -w//2, GROUND_Y -h, w, h, img, name=name, tags=tags)
     return structure
 
 def create_objects(chunk_data, scroll):
-    ''' Creates objects from chunk data.
+    ''' Creates objects from chunk data (for chunks within RENDER_DISTANCE of scroll).
+    Returns 5 lists of objects (background objects, interactable background objects, 
+    playable objects, foreground objects, and interactable foreground objects) '''
+    from main import CHUNK_SIZE, RENDER_DISTANCE
+    objs = [[] for i in range(5)]
+    curr_chunk = scroll//CHUNK_SIZE # covert scroll (pixels) to chunk number
+    chunk_range = range(curr_chunk-RENDER_DISTANCE//2, curr_chunk+RENDER_DISTANCE//2 +1)
+    for chunk in chunk_range:
+        if chunk not in chunk_data: continue
+        for l, new in zip(objs, create_chunk_objects(chunk_data, chunk)): l.extend(new)
+    return objs
+
+def create_chunk_objects(chunk_data, chunk):
+    ''' Creates objects from the chunk data of one chunk.
+    Objects created from tile lists (trees, grass, rocks) remember their chunk and tile (obj.chunk, obj.tile)
     Returns 5 lists of objects (background objects, interactable background objects, 
     playable objects, foreground objects, and interactable foreground objects) '''
-    from main import ANIMATION_DATABASE, CHUNK_SIZE, RENDER_DISTANCE, TILE_SIZE, SCREEN_HEIGHT, PIXEL_SIZE, FILENAME_TO_IMGS
-    bg_objs = [] # not interactable (e.g., cloud), drawn before people, in background
+    from main import ANIMATION_DATABASE, CHUNK_SIZE, TILE_SIZE, SCREEN_HEIGHT, PIXEL_SIZE, images
+    bg_objs = [] # not interactable, drawn before people, in background (clouds are drawn by sky.CloudLayer)
     interactable_bg_objs = [] # interactiable objects (e.g., trees), drawn before people, in background
     fg_objs = [] # not interactable (e.g., grass), drawn after people, in foreground
     interactable_fg_objs = [] # interactiable objects (e.g., rocks), drawn after people, in foreground
     playable_objs = [] # Person objects (people)
-    curr_chunk = scroll//CHUNK_SIZE # covert scroll (pixels) to chunk number
-    chunk_range = range(curr_chunk-RENDER_DISTANCE//2, curr_chunk+RENDER_DISTANCE//2 +1)
 
-    for chunk in chunk_range:
-    # background (not interactable)
-        # clouds
-        for i in range(CLOUDS_PER_CHUNK):
-            if random.random() < CLOUD_PROB:
-                pixel = random.randint(i*CHUNK_SIZE, (i+1)*CHUNK_SIZE)
-                cloud_type = random.randint(0,2)
-                cloud = f'cloud{cloud_type}'
-                if cloud not in FILENAME_TO_IMGS.keys():
-                    FILENAME_TO_IMGS[cloud] = utility.load_image(f'img/envir/{cloud}.png')
-                cloud_height = random.randint(TILE_SIZE,SCREEN_HEIGHT//2)
-                w, h = ANIMATION_DATABASE['cloud']
-                if random.random() < .5:
-                    cloud = obj.Object(chunk*CHUNK_SIZE +pixel -w//2, \
-                        cloud_height, w, h, FILENAME_TO_IMGS[cloud], tags=['cloud'])
-                else:
-                    cloud = obj.Object(chunk*CHUNK_SIZE +pixel -w//2, \
-                        cloud_height, w, h, utility.flip_img(FILENAME_TO_IMGS[cloud]), tags=['cloud'])
-                bg_objs.append(cloud)
-        
-    # interactable background
-        # structures
-        for tup in chunk_data[chunk]['structures']:
-            struct,x = tup
-            interactable_bg_objs.append(create_structure(struct,x))
-        # trees
-        w, h = ANIMATION_DATABASE['spruce_tree']
-        for tile,plant in enumerate(chunk_data[chunk]['trees']):
-            if plant: 
-                if plant not in FILENAME_TO_IMGS.keys():
-                    FILENAME_TO_IMGS[plant] = utility.load_image(f'img/envir/flora/{plant}.png')
-                if random.random() < .5:
-                    tree = obj.Object(chunk*CHUNK_SIZE +tile*TILE_SIZE +TILE_SIZE//2 -w//2, \
-                        SCREEN_HEIGHT*3/4 -h, w, h, FILENAME_TO_IMGS[plant], loot=['log'], tags=['wood'])
-                else:
-                    tree = obj.Object(chunk*CHUNK_SIZE +tile*TILE_SIZE +TILE_SIZE//2 -w//2, \
-                        SCREEN_HEIGHT*3/4 -h, w, h, utility.flip_img(FILENAME_TO_IMGS[plant]), loot=['log'], tags=['wood'])
-                interactable_bg_objs.append(tree)
-
-    # people
-        w, h = ANIMATION_DATABASE['person'] # 36x80 pixels
-        for tup in chunk_data[chunk]['people']:
-            img_name, x = tup
-            img = utility.load_image(f'img/char/{img_name}.png')
-            person = obj.Person(x, SCREEN_HEIGHT*3/4 - h, w, h, img, facing='left')
-            playable_objs.append(person)
-
-    # foreground (not interactable)
-        # grass
-        w, h = ANIMATION_DATABASE['grass']
-        for tile,g in enumerate(chunk_data[chunk]['grass']):
-            if g: 
-                if g not in FILENAME_TO_IMGS.keys():
-                    FILENAME_TO_IMGS[g] = utility.load_image(f'img/envir/{g}.png')
-                if random.random() < .5:
-                    grass = obj.Object(chunk*CHUNK_SIZE +tile*TILE_SIZE, \
-                        SCREEN_HEIGHT*3/4 -h +PIXEL_SIZE//2, w, h, FILENAME_TO_IMGS[g])
-                else:
-                    grass = obj.Object(chunk*CHUNK_SIZE +tile*TILE_SIZE, \
-                        SCREEN_HEIGHT*3/4 -h +PIXEL_SIZE//2, w, h, utility.flip_img(FILENAME_TO_IMGS[g]))
-                fg_objs.append(grass)
-
-    # interactable foreground 
-        # animals
-        for tup in chunk_data[chunk]['animals']:
-            animal,x = tup
-            img = utility.load_image(f'img/envir/fauna/{animal}.png')
-            w, h = ANIMATION_DATABASE[animal]
-            if random.random() < .5:
-                animal = obj.Animal(x -w//2, SCREEN_HEIGHT*3//4 -h, w, h, img, tags=['fearful'])
-            else:
-                animal = obj.Animal(x -w//2, SCREEN_HEIGHT*3//4 -h, w, h, img, facing='left', tags=['fearful'])
-            interactable_fg_objs.append(animal)
-        # items
-        for tup in chunk_data[chunk]['items']:
-            img_name, x = tup
+# interactable background
+    # structures
+    for tup in chunk_data[chunk]['structures']:
+        if len(tup) > 2: # saved Structure
+            state = tup[2]
+            struct = create_structure(tup[0], tup[1], inventory=dict(state['inventory']), built=state['built'])
+        else: struct = create_structure(tup[0], tup[1])
+        interactable_bg_objs.append(struct)
+    # trees
+    w, h = ANIMATION_DATABASE['spruce_tree']
+    for tile,plant in enumerate(chunk_data[chunk]['trees']):
+        if plant: 
+            img = images.get(f'img/envir/flora/{plant}.png', flip=random.random() >= .5)
+            tree = obj.Object(chunk*CHUNK_SIZE +tile*TILE_SIZE +TILE_SIZE//2 -w//2, \
+                SCREEN_HEIGHT*3/4 -h, w, h, img, name=plant, loot=['log'], tags=['wood'])
+            tree.chunk, tree.tile = chunk, tile
+            interactable_bg_objs.append(tree)
+
+# people
+    w, h = ANIMATION_DATABASE['person'] # 36x80 pixels
+    for tup in chunk_data[chunk]['people']:
+        img_name, x = tup[0], tup[1]
+        img = images.get(f'img/char/{img_name}.png')
+        person = obj.Person(x, SCREEN_HEIGHT*3/4 - h, w, h, img, name=img_name, facing='left')
+        if len(tup) > 2: # saved Person
+            state = tup[2]
+            person.health, person.hunger, person.stamina = state['health'], state['hunger'], state['stamina']
+            for item_id, quantity in state['inventory'].items(): person.update_inv(item_id, quantity)
+            if state['item']: 
+                item = create_item(state['item'], x, obj_class='item')
+                person.pick_up(item)
+                interactable_fg_objs.append(item)
+        else:
+            # fill inventory in DEBUG mode
+            from main import DEBUG
+            if DEBUG:
+                wood = images.get('img/item/log.png')
+                for i in range(2):
+                    w, h = ANIMATION_DATABASE['rock']
+                    rock = create_item('rock', 0, path='img/envir/')
+                    person.pick_up(rock) 
+                    w, h = ANIMATION_DATABASE['log'] 
+                    person.pick_up(obj.Object(0, 0, w, h, wood, id='log', tags=['item']))
+                person.inventory.update({})
+                w, h = ANIMATION_DATABASE['person']
+        playable_objs.append(person)
+
+# foreground (not interactable)
+    # grass
+    w, h = ANIMATION_DATABASE['grass']
+    for tile,g in enumerate(chunk_data[chunk]['grass']):
+        if g: 
+            img = images.get(f'img/envir/{g}.png', flip=random.random() >= .5)
+            grass = obj.Object(chunk*CHUNK_SIZE +tile*TILE_SIZE, \
+                SCREEN_HEIGHT*3/4 -h +PIXEL_SIZE//2, w, h, img, name=g)
+            grass.chunk, grass.tile = chunk, tile
+            fg_objs.append(grass)
+
+# interactable foreground 
+    # animals
+    for tup in chunk_data[chunk]['animals']:
+        animal,x = tup[0], tup[1]
+        img = images.get(f'img/envir/fauna/{animal}.png')
+        w, h = ANIMATION_DATABASE[animal]
+        if random.random() < .5:
+            animal = obj.Animal(x -w//2, SCREEN_HEIGHT*3//4 -h, w, h, img, name=animal, tags=['fearful'])
+        else:
+            animal = obj.Animal(x -w//2, SCREEN_HEIGHT*3//4 -h, w, h, img, name=animal, facing='left', tags=['fearful'])
+        interactable_fg_objs.append(animal)
+    # items
+    for tup in chunk_data[chunk]['items']:
+        img_name, x = tup[0], tup[1]
+        if f'{img_name}_sheet' in ANIMATION_DATABASE: # held item
             interactable_fg_objs.append(create_item(img_name, x, obj_class='item'))
-        # rocks
-        w, h = ANIMATION_DATABASE['rock']
-        for tile,r in enumerate(chunk_data[chunk]['rocks']):
-            if r: 
-                if r not in FILENAME_TO_IMGS.keys():
-                    FILENAME_TO_IMGS[r] = utility.load_image(f'img/envir/{r}.png')
-                img = FILENAME_TO_IMGS[r] 
-                if random.random() < .5: img = utility.flip_img(img)
-                rock = obj.Object(chunk*CHUNK_SIZE +tile*TILE_SIZE +TILE_SIZE//2 -w//2, \
-                    SCREEN_HEIGHT*3/4 -h/2, w, h, img, id='rock', tags=['item'])
-                interactable_fg_objs.append(rock)
-    
-    # fill inventory in DEBUG mode
-    from main import DEBUG
-    if DEBUG:
-        wood = utility.load_image('img/item/log.png')
-        for i in range(2):
-            w, h = ANIMATION_DATABASE['rock']
-            rock = create_item('rock', 0, path='img/envir/')
-            person.pick_up(rock) 
-            w, h = ANIMATION_DATABASE['log'] 
-            person.pick_up(obj.Object(0, 0, w, h, wood, id='log', tags=['item']))
-        person.inventory.update({})
+        elif img_name == 'rock': interactable_fg_objs.append(create_item(img_name, x, path='img/envir/'))
+        else: interactable_fg_objs.append(create_item(img_name, x))
+    # rocks
+    w, h = ANIMATION_DATABASE['rock']
+    for tile,r in enumerate(chunk_data[chunk]['rocks']):
+        if r: 
+            img = images.get(f'img/envir/{r}.png', flip=random.random() < .5)
+            rock = obj.Object(chunk*CHUNK_SIZE +tile*TILE_SIZE +TILE_SIZE//2 -w//2, \
+                SCREEN_HEIGHT*3/4 -h/2, w, h, img, id='rock', name=r, tags=['item'])
+            rock.chunk, rock.tile = chunk, tile
+            interactable_fg_objs.append(rock)
     
     return bg_objs, interactable_bg_objs, playable_objs, fg_objs, interactable_fg_objs
 
+def bake(args):
+    ''' Generates every chunk of a world (all continents and oceans) across a pool of processes and 
+    writes the chunk data to a json file. Chunks are generated in ranges of BAKE_TASK_SIZE chunks, each 
+    chunk from its own seed (see get_chunk_rng), so the file is identical for any number of workers.
+    args (command line):
+        --out FILE - json file to write {'seed': int, 'world_size': int, 'chunks': {chunk_number: {<chunk data>}}}
+        --seed N - world seed (DEFAULT: random)
+        --world-size N - number of chunks (DEFAULT: WORLD_SIZE)
+        --workers N[,N...] - number of worker processes; with more than one value, the world is generated once 
+            for each and chunks/sec is reported for each (DEFAULT: os.cpu_count()) '''
+    seed = random.getrandbits(32)
+    if '--seed' in args: seed = int(args[args.index('--seed')+1])
+    size = WORLD_SIZE
+    if '--world-size' in args: size = int(args[args.index('--world-size')+1])
+    workers = [os.cpu_count()]
+    if '--workers' in args: workers = [int(n) for n in args[args.index('--workers')+1].split(',')]
+
+    tasks = [(lower, min(lower +BAKE_TASK_SIZE, size//2)) for lower in range(-size//2, size//2, BAKE_TASK_SIZE)]
+    baked = None
+    for n in workers:
+        start = perf_counter()
+        if n <= 1: # serial
+            init_bake_worker(seed, size)
+            parts = [bake_range(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(n, initializer=init_bake_worker, initargs=(seed, size)) as pool:
+                parts = list(pool.map(bake_range, *zip(*tasks)))
+        elapsed = perf_counter() -start
+        print(f'{n} worker(s): {size} chunks in {elapsed:.2f}s ({size/elapsed:.0f} chunks/sec)')
+        if baked != None and parts != baked: print('WARNING: chunk data differs from the previous run')
+        baked = parts
+
+    if '--out' in args:
+        with open(args[args.index('--out')+1], 'w') as file:
+            file.write(f'{{"seed": {seed}, "world_size": {size}, "chunks": {{')
+            file.write(', '.join(part for part in baked if part))
+            file.write('}}')
+
+def init_bake_worker(seed, size):
+    ''' set up a process for generating chunks (see bake) '''
+    set_world_size(size)
+    generate_world(seed) # continent and ocean sizes
+
+def bake_range(lower, upper):
+    ''' Returns json for chunks lower to upper ('"chunk_number": {<chunk data>}, ...') '''
+    return ', '.join(f'"{chunk}": ' +json.dumps(generate_chunk(chunk, get_biome(chunk), rng=get_chunk_rng(chunk))) \
+        for chunk in range(lower, upper))
@@ -0,0 +1,64 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import pygame
+
+TEXT_CACHE_SIZE = 512 # rendered strings kept (see render_text)
+TEXT = {} # maps (font, text, color) to rendered text
+
+def render_text(font, text, color):
+    ''' Returns text (str) rendered (antialiased) in font and color, cached '''
+    key = (font, text, color)
+    if key not in TEXT:
+        if len(TEXT) >= TEXT_CACHE_SIZE: TEXT.clear() # HUD strings are few (counts, health), so rarely hit
+        TEXT[key] = font.render(text, True, color)
+    return TEXT[key]
+
+def get_slot(pos, columns):
+    ''' Returns (column x, row) of the HUD slot (item border) at pos, e.g., the mouse position, or None
+    columns - list of x positions of HUD columns (e.g., main.INV_x) '''
+    from main import HUD_y, TILE_SIZE, HUD_spacing, ITEM_BORDER
+    x, y = pos
+    for col in columns:
+        if x > col and x < col +TILE_SIZE +ITEM_BORDER: break
+    else: return None
+    # row i spans (HUD_y +TILE_SIZE*(i+1) +HUD_spacing*i, HUD_y +TILE_SIZE*(i+2) +HUD_spacing*(i+1)), exclusive
+    row, offset = divmod(y -HUD_y -TILE_SIZE, TILE_SIZE +HUD_spacing)
+    if row < 0 or offset == 0: return None
+    return (col, row)
+
+class HudLayer(object):
+    ''' The HUD (see obj.Controller.draw_hud), drawn onto a cached transparent surface and blitted onto the screen.
+    It's only redrawn when what it shows changes (see obj.Controller.get_hud_key): inventories (update_inv),
+    health, displayed hunger, recipes, buildable structures, or the slot under the mouse. '''
+    def __init__(self, size):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.rect = pygame.Rect(0, 0, 0, 0) # area of surface drawn on
+        self.key = None # what the HUD was drawn for
+
+    def update(self, controller):
+        ''' redraw the HUD if it's changed. Returns list of regions (pygame.Rects) of the screen changed '''
+        key = controller.get_hud_key(pygame.mouse.get_pos())
+        if key == self.key: return []
+        old = self.rect
+        self.surface.fill((0,0,0,0))
+        controller.draw_hud(self.surface)
+        self.rect = self.surface.get_bounding_rect()
+        self.key = key
+        return [r for r in (old, self.rect) if r.w and r.h]
+
+    def draw(self, surface, rects=None):
+        ''' blit the HUD onto surface (e.g., the screen)
+        rects - list of regions of surface redrawn since the HUD was last blitted (not overlapping), None for all of it
+        Returns number of blits '''
+        if not self.rect.w or not self.rect.h: return 0
+        if rects == None: 
+            surface.blit(self.surface, self.rect, self.rect)
+            return 1
+        blits = 0
+        for r in rects:
+            r = self.rect.clip(r)
+            if r.w and r.h:
+                surface.blit(self.surface, r, r)
+                blits += 1
+        return blits
@@ -0,0 +1,98 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import math
+import pygame
+import utility
+
+class Lighting(object):
+    ''' Darkness for the day/night cycle, brightened around light sources (objects tagged 'light'),
+    multiplied onto the frame. Light sources must be added and removed like spatial.SpatialIndex's objects.
+    The lightmap (darkness and lights) is drawn at pixel_size (full resolution pixels per lightmap pixel)
+    across the view and half a view either side, anchored to the world, and kept between frames.
+    It's only redrawn when the darkness changes by a step, lights change or move, the zoom changes,
+    or the view scrolls past what it covers. At full daylight (nothing to darken) nothing is drawn. '''
+    def __init__(self, mask, light_scale, pixel_size, step):
+        self.mask = mask # pygame.Surface, white with alpha (how much light reaches each pixel)
+        self.light_scale = light_scale # size of lighted area relative to light source size
+        self.pixel_size = pixel_size # full resolution pixels per lightmap pixel
+        self.step = step # brightness (out of 255) the darkness changes by
+        self.lights = {} # maps id(obj) to obj, for light sources
+        self.masks = {} # maps size (in lightmap pixels) to mask scaled to size
+        self.lightmap = None # pygame.Surface
+        self.scaled = None # lightmap scaled to the pixel size of the surface it's drawn on
+        self.left, self.right = None, None # world x positions (in pixels) covered by the lightmap
+        self.key = None # what the lightmap was drawn for (see draw)
+        self.renders = 0 # number of times the lightmap was drawn
+
+    def __len__(self):
+        return len(self.lights)
+
+    def add(self, obj):
+        ''' add obj if it's a light source '''
+        if 'light' in obj.tags: self.lights[id(obj)] = obj
+
+    def remove(self, obj):
+        self.lights.pop(id(obj), None)
+
+    def rebuild(self, objs):
+        ''' remove every light source and add those in objs '''
+        self.lights = {}
+        for obj in objs: self.add(obj)
+
+    def get_brightness(self, time):
+        ''' Returns brightness (0 to 255, in steps) of the darkness at time (in seconds) '''
+        from main import MAX_DARKNESS, SECONDS_PER_DAY
+        c = (255-MAX_DARKNESS)/2*math.sin(2*math.pi*time/SECONDS_PER_DAY) +(255+MAX_DARKNESS)/2
+        return min(255, round(c/self.step)*self.step)
+
+    def get_mask(self, size):
+        ''' Returns mask scaled to size (in lightmap pixels) '''
+        if size not in self.masks: self.masks[size] = pygame.transform.smoothscale(self.mask, size)
+        return self.masks[size]
+
+    def draw(self, surf, surf_size, time):
+        ''' multiply lighting onto surf (render.RenderTarget)
+        Returns number of blits '''
+        brightness = self.get_brightness(time)
+        if brightness >= 255: return 0 # full daylight
+        from main import get_visible_range
+        left, right = get_visible_range(surf_size)
+        pixel_size = max(self.pixel_size, surf.pixel_size) # no finer than surf
+        lights = tuple((o.rect.centerx, o.rect.centery, o.width, o.height) for o in self.lights.values())
+        key = (brightness, pixel_size, surf.pixel_size, surf_size, lights)
+        blits = 1
+        if key != self.key or left < self.left or right > self.right:
+            blits += self.render(surf, surf_size, brightness, pixel_size, left, right)
+            self.key = key
+        # left is at the left edge of surf
+        surf.blit(self.scaled, (self.left -left, 0), special_flags=pygame.BLEND_MULT, scaled=True, version=self.renders)
+        return blits
+
+    def render(self, surf, surf_size, brightness, pixel_size, left, right):
+        ''' draw the lightmap for the view from left to right (world x positions). Returns number of blits '''
+        margin = surf_size[0]//2
+        self.left = (left -margin)//pixel_size*pixel_size
+        self.right = right +margin
+        size = (math.ceil((self.right -self.left)/pixel_size), math.ceil(surf_size[1]/pixel_size))
+        if self.lightmap == None or self.lightmap.get_size() != size: self.lightmap = pygame.Surface(size).convert()
+        self.lightmap.fill((brightness, brightness, brightness))
+        self.renders += 1
+        blits = 0
+        for o in self.lights.values():
+            w, h = o.width*self.light_scale, o.height*self.light_scale
+            x, y = o.rect.centerx -w//2, o.rect.centery -h//2
+            if x +w < self.left or x > self.right: continue
+            y = utility.zoom_transform(surf_size, (0, y))[1]
+            mask = self.get_mask((max(1, round(w/pixel_size)), max(1, round(h/pixel_size))))
+            self.lightmap.blit(mask, ((x -self.left)//pixel_size, y//pixel_size))
+            blits += 1
+        # scale to surf's pixel size
+        factor = pixel_size/surf.pixel_size
+        if factor == 1: self.scaled = self.lightmap
+        else:
+            scaled_size = (round(size[0]*factor), round(size[1]*factor))
+            if self.scaled == None or self.scaled is self.lightmap or self.scaled.get_size() != scaled_size:
+                self.scaled = pygame.Surface(scaled_size).convert()
+            pygame.transform.scale(self.lightmap, scaled_size, self.scaled)
+        return blits
@@ -4,12 +4,39 @@
 #1 IMPORTS
 import pygame
 import sys
+import os
 import obj 
 import generate
 import utility
+import profiler
+import streaming
+import spatial
+import chunkcache
+import render
+import lighting
+import fauna
+import vitals
+import assets
+import hud
+import sky
+import save
 import math
+from time import strftime, perf_counter
+START_TIME = perf_counter() # for time to first frame (see run)
+
+if __name__ == '__main__':
+    # obj.py and generate.py read game variables with "from main import ...", 
+    # so run the game from the importable main module instead of from __main__
+    import main
+    main.START_TIME = START_TIME
+    main.run(sys.argv[1:])
+    sys.exit()
 
 #2 SETUP
+# headless mode (no window, for simulating without a display)
+HEADLESS = '--headless' in sys.argv or os.environ.get('SDL_VIDEODRIVER') == 'dummy'
+if HEADLESS: os.environ['SDL_VIDEODRIVER'] = 'dummy' # must be set before pygame.init
+
 # clock and time
 pygame.init()
 clock = pygame.time.Clock()
@@ -20,24 +47,34 @@ FRAMES_PER_DAY = FPS*SECONDS_PER_DAY
 # window
 MAX_ZOOM = 2 # scale facor
 MIN_ZOOM = 0.5 # scale facor
+ZOOM_LEVELS = [MIN_ZOOM, 1, MAX_ZOOM] # scale factors zoom stops at with DISCRETE_ZOOM (sorted)
+DISCRETE_ZOOM = '--zoom-levels' in sys.argv # zoom steps between ZOOM_LEVELS, levels below 1 are drawn with pre-scaled images (see draw_level)
 ASPECT_RATIO = 9/16
 screen_info = pygame.display.Info()
 window_size = (screen_info.current_w, round(screen_info.current_w*ASPECT_RATIO)) # 16:9 aspect ratio
 SCREEN_WIDTH, SCREEN_HEIGHT = window_size[0], window_size[1]
-screen = pygame.display.set_mode(window_size, flags=pygame.SCALED, vsync=1)
+if HEADLESS: screen = pygame.display.set_mode(window_size) # dummy video driver can't create a SCALED renderer
+else: screen = pygame.display.set_mode(window_size, flags=pygame.SCALED, vsync=1)
 pygame.display.set_caption('kingdom') 
 
+# images (loaded once and shared, see assets.py)
+images = assets.AssetManager()
+images.preload(assets.find_images(assets.DIRS), assets.BUNDLE_FILE) # from the bundle if it's been made
+
 # sizing
 GROUND_Y = SCREEN_HEIGHT*3//4 # should be 3/4 from top of screen
-PIXEL_SIZE = 4 # in-game "pixel" size, measured in pixels (chunkiness of art)
+from sizes import PIXEL_SIZE, PIXELS_PER_TILE, TILE_SIZE, TILES_PER_CHUNK, CHUNK_SIZE # also used without the game (see sizes.py)
 SPRITESHEET_SPACING = 8 # in pixels
-PIXELS_PER_TILE = 8
-TILE_SIZE = PIXELS_PER_TILE*PIXEL_SIZE # in pixels
-TILES_PER_CHUNK = 16 # in tiles
-CHUNK_SIZE = TILES_PER_CHUNK*TILE_SIZE # in pixels
 DEF_STRUCTURE_SIZE = CHUNK_SIZE//4 # in pixels
 RENDER_DISTANCE = math.ceil(SCREEN_WIDTH/MIN_ZOOM/CHUNK_SIZE) # in chunks
+STREAM_DISTANCE = RENDER_DISTANCE//2 +1 # in chunks, objects exist for chunks within this distance of the center of the screen
 CLAMP_WIDTH = TILE_SIZE*5 # for clamping scroll when playing as a Person
+CHUNK_CACHE_BUDGET = 64*2**20 # in bytes, for pre-rendered chunk layers (see chunkcache.py)
+CULL_MARGIN = TILE_SIZE # in pixels, objects can draw this far outside their width (e.g., held items)
+BROADPHASE_MARGIN = PIXEL_SIZE*2 # in pixels, more than a Person moves in a tick (see spatial.SweepAndPrune)
+NATIVE_RENDER = '--native' in sys.argv # draw the world at the art's resolution (1/PIXEL_SIZE) and scale it up once, see render.py
+RENDER_PIXEL_SIZE = PIXEL_SIZE if NATIVE_RENDER else 1 # screen pixels per pixel the world is drawn with
+DIRTY_RECTS = '--dirty-rects' in sys.argv # redraw and update only regions of the screen which changed (e.g., moving objects), see render.RenderTarget
 
 # databases
 CRAFTING_RECIPES = { # maps product to recipe {material: quantity}
@@ -53,7 +90,9 @@ ANIMATION_DATABASE = { # maps object names to [width, height] of object (current
 # lighting
 MAX_DARKNESS = 20 # darkest the screen will get at night
 DEF_LIGHT_SCALE = 8 # size of lighted area relative to light source size
-LIGHT_MASK = utility.load_image('img/envir/light_mask.png') # for objects which light up the night
+LIGHT_MASK = images.get('img/envir/light_mask.png') # for objects which light up the night
+LIGHTMAP_PIXEL_SIZE = PIXEL_SIZE # in pixels, resolution of darkness and lights (see lighting.Lighting)
+DAYLIGHT_STEP = 4 # darkness changes by this much brightness (out of 255), the lightmap is redrawn when it does
 
 # HUD
 HUD_spacing = PIXEL_SIZE*4 # spacing between HUD elements 
@@ -71,7 +110,7 @@ ITEM_ID_TO_HUD_IMG = {} # item id/structure name to HUD-scaled image
 ITEMS = ['log', 'rock', 'axe', 'hammer'] # items that need an inventory image
 for item in ITEMS:
     # scale larger dimension of item image to TILE_SIZE 
-    item_img = utility.load_image(f'img/item/{item}.png')
+    item_img = images.get(f'img/item/{item}.png')
     inv_img = pygame.Surface((TILE_SIZE,TILE_SIZE), pygame.SRCALPHA)
     w, h = ANIMATION_DATABASE[item]
     if w > h: # width larger
@@ -85,7 +124,7 @@ for item in ITEMS:
     ITEM_ID_TO_HUD_IMG[item] = inv_img
 for struct in STRUCTURE_RECIPES.keys():
     # scale larger dimension of structure image to TILE_SIZE 
-    struct_img = utility.load_image(f'img/structure/{struct}.png')
+    struct_img = images.get(f'img/structure/{struct}.png')
     inv_img = pygame.Surface((TILE_SIZE,TILE_SIZE), pygame.SRCALPHA)
     w, h = ANIMATION_DATABASE[struct]
     if w > h: # width larger
@@ -98,21 +137,112 @@ for struct in STRUCTURE_RECIPES.keys():
         inv_img.blit(scaled_img, (TILE_SIZE//2 -int(w*scale_factor)//2, 0))
     ITEM_ID_TO_HUD_IMG[struct] = inv_img
 # for HUD health and hunger
-HEALTH_IMG = utility.load_image('img/hud/health.png')
-HUNGER_IMG = utility.load_image('img/hud/hunger.png')
+HEALTH_IMG = images.get('img/hud/health.png')
+HUNGER_IMG = images.get('img/hud/hunger.png')
 
 # scale border size for inventory items
-INV_BORDER_IMG = utility.load_image('img/hud/inv_border.png')
-INV_BORDER_SELECTED_IMG = utility.load_image('img/hud/inv_border_selected.png')
-if INV_BORDER_IMG.get_size() != (TILE_SIZE+ITEM_BORDER, TILE_SIZE+ITEM_BORDER): # scale images (if necessary, set up for 32px TILE_SIZE and 8px ITEM_BORDER)
-    INV_BORDER_IMG = pygame.transform.scale(INV_BORDER_IMG, (TILE_SIZE+ITEM_BORDER, TILE_SIZE+ITEM_BORDER))
-    INV_BORDER_SELECTED_IMG = pygame.transform.scale(INV_BORDER_SELECTED_IMG, (TILE_SIZE+ITEM_BORDER, TILE_SIZE+ITEM_BORDER))
+# (scaled if necessary, set up for 32px TILE_SIZE and 8px ITEM_BORDER)
+INV_BORDER_IMG = images.get('img/hud/inv_border.png', size=(TILE_SIZE+ITEM_BORDER, TILE_SIZE+ITEM_BORDER))
+INV_BORDER_SELECTED_IMG = images.get('img/hud/inv_border_selected.png', size=(TILE_SIZE+ITEM_BORDER, TILE_SIZE+ITEM_BORDER))
 
 # misc
 DEBUG = False
+DEBUG_FONT = pygame.font.Font(None, 24)
+TRACE_KEY = pygame.K_F2 # start/stop writing a per-frame csv trace (to TRACE_DIR)
+TRACE_DIR = 'traces'
+PROFILE_KEY = pygame.K_F3 # record the next PROFILE_FRAMES frames with cProfile (saved to PROFILE_DIR)
+PROFILE_FRAMES = 300
+PROFILE_DIR = 'profiles'
+SAVE_KEY = pygame.K_F5 # save the world (also saved when quitting)
+SAVE_DIR = 'save' # see save.py, worlds made with --seed N are saved to SAVE_DIR-N instead
+AUTOSAVE_INTERVAL = 60 # in seconds, changed chunks are saved in the background this often
+autosaver = save.AutoSaver(AUTOSAVE_INTERVAL)
+perf = profiler.Profiler() # times each phase of a frame
 PARALAX_FACTOR = .8
-TILE_MASK = utility.load_image('img/envir/tiles/tile_mask.png') # gradient, tiles to black
-SCAFFOLDING_IMG = utility.load_image('img/structure/scaffolding.png') # for structures in-progress
+TILE_MASK = images.get('img/envir/tiles/tile_mask.png') # gradient, tiles to black
+
+class World(object):
+    ''' Fixed timestep simulation clock.
+    Advances the Controller, Animals and Persons one tick (1/FPS seconds of game time) at a time,
+    independent of pygame.time, so the game can be simulated headless and faster than real time.
+    modifies global vars time, day and zoom '''
+    def __init__(self, start_time=0, ticks=0):
+        self.start_time = start_time # in seconds
+        self.ticks = ticks # number of ticks simulated
+        self.lag = 0 # in ticks, time passed to step() which hasn't been simulated yet
+
+    def get_ticks(self):
+        ''' replacement for pygame.time.get_ticks() that follows the simulated clock. 
+        Returns game time in milliseconds '''
+        return self.ticks*1000//FPS
+
+    def step(self, dt):
+        ''' advance the simulation by dt seconds (in whole ticks, the remainder carries over to the next step)
+        Returns the number of ticks simulated '''
+        self.lag += dt*FPS
+        n = int(self.lag)
+        self.lag -= n
+        self.run_ticks(n)
+        return n
+
+    def run_ticks(self, n):
+        ''' advance the simulation by n ticks '''
+        for i in range(n): self.tick()
+
+    def tick(self):
+        ''' advance the simulation by one tick '''
+        global time, day, zoom
+        # update time
+        self.ticks += 1
+        time = self.ticks/FPS%SECONDS_PER_DAY +self.start_time
+        day = self.ticks/FPS//SECONDS_PER_DAY
+
+        # update objects
+        with perf.phase('controller'):
+            zoom = controller.update(spatial_index, scroll, zoom)
+        with perf.phase('streaming'):
+            streamer.update(scroll +SCREEN_WIDTH//2) # create/drop objects for chunks entering/leaving STREAM_DISTANCE
+        data = {}
+        with perf.phase('animals'):
+            animals.update(self.ticks) # update Animals
+        with perf.phase('broadphase'):
+            broadphase.update(playable_objs, spatial_index) # set Persons' contacts
+        with perf.phase('people'):
+            for p in playable_objs: # update Persons
+                data.update(p.update(spatial_index))
+                spatial_index.move(p)
+        with perf.phase('vitals'):
+            for p in people.update(): # Persons who died
+                controller.release(p)
+                died = p.die()
+                for key in ('destroy', 'create'): data.setdefault(key, []).extend(died[key])
+        
+        # create and destroy new objects as needed
+        with perf.phase('create_destroy'):
+            if data:
+                for o in data['destroy']:  #TODO
+                    chunk_data.mark_dirty(streamer.get_chunk(o))
+                    chunk_cache.invalidate(streamer.get_chunk(o))
+                    spatial_index.remove(o)
+                    lights.remove(o)
+                    animals.remove(o)
+                    people.remove(o)
+                    if o in playable_objs: playable_objs.remove(o)
+                    else:
+                        try: interactable_bg_objs.remove(o)
+                        except: interactable_fg_objs.remove(o)
+                for l in data['create']: 
+                    o, layer = l
+                    chunk_data.mark_dirty(streamer.get_chunk(o))
+                    chunk_cache.invalidate(streamer.get_chunk(o))
+                    spatial_index.add(o)
+                    lights.add(o)
+                    animals.add(o)
+                    people.add(o)
+                    if layer == 'bg': interactable_bg_objs.append(o)
+                    elif layer == 'fg': interactable_fg_objs.append(o)
+                    else: playable_objs.append(o)     
+        perf.set('live_objects', len(bg_objs)+len(interactable_bg_objs)+len(playable_objs)+len(fg_objs)+len(interactable_fg_objs))
 
 # helper functions that directly modify key game variables
 def update_chunk_data(name,x,data_list,add=True): 
@@ -120,7 +250,7 @@ def update_chunk_data(name,x,data_list,add=True):
     global chunk_data
     if add:
         if data_list in ['animals', 'structures', 'people', 'items']:
-            chunk_data[int(x//CHUNK_SIZE)][data_list].append((name,int(x))) # update chunk data
+            chunk_data.add_entity(int(x//CHUNK_SIZE), data_list, (name,int(x))) # update chunk data
 
 def clamp_scroll(player, type='scroll'):
     ''' keeps scroll value within set range
@@ -137,166 +267,254 @@ def clamp_scroll(player, type='scroll'):
             scroll -= scroll + (SCREEN_WIDTH//2 - player.width//2 - CLAMP_WIDTH//2) - player.x
 
 def draw_ground(surf,surf_size):
-    ''' uses chunk_data to draw ground tiles '''
+    ''' draws ground tiles (pre-rendered for each chunk, see chunk_cache) '''
     width, height = surf_size
     fg = pygame.Rect(0,height*3//4,width,height//4+1)
     surf.fill((0,0,0),fg) 
-
-    # DRAW TILES
-    curr_chunk = int((scroll+SCREEN_WIDTH//2)/CHUNK_SIZE) # covert scroll (pixels) to chunk number
-    chunk_range = range(curr_chunk -width//CHUNK_SIZE//2 -2, curr_chunk +width//CHUNK_SIZE//2 +2)
-    for chunk in chunk_range:
-        for i,tile in enumerate(chunk_data[chunk]['tiles']):
-            if tile not in FILENAME_TO_IMGS.keys():
-                FILENAME_TO_IMGS[tile] = utility.load_image(f'img/envir/tiles/{tile}.png')
-            x, y = utility.zoom_transform(surf_size, (chunk*CHUNK_SIZE +TILE_SIZE*i,GROUND_Y))
-            surf.blit(FILENAME_TO_IMGS[tile], (x-scroll, y))
-            surf.blit(FILENAME_TO_IMGS[tile], (x-scroll, y+TILE_SIZE))
-            surf.blit(TILE_MASK, (x-scroll, y+TILE_SIZE))
+    perf.count('blits', chunk_cache.draw(surf, scroll, surf_size, 'ground', get_visible_chunks(surf_size)))
 
 def draw_lighting(surf,surf_size):
-    ''' handles lighting system for day/night cycle and light source objects '''
-    # draw darkness for night 
-    night = pygame.Surface(surf_size)
-    c = (255-MAX_DARKNESS)/2*math.sin(2*math.pi*time/SECONDS_PER_DAY) +(255+MAX_DARKNESS)/2
-    night.fill((c,c,c))
-    # draw lighting for light sources
-    for obj in interactable_bg_objs+interactable_fg_objs:
-        if 'light' in obj.tags:
-            light = pygame.transform.scale(LIGHT_MASK, (obj.width*DEF_LIGHT_SCALE, obj.height*DEF_LIGHT_SCALE))
-            rect = light.get_rect()
-            rect.center = obj.rect.center
-            rect.x, rect.y = utility.zoom_transform(surf_size, (rect.x,rect.y))
-            rect.x -= scroll
-            night.blit(light, rect)
-    surf.blit(night, (1-zoom,0), special_flags=pygame.BLEND_MULT)
+    ''' handles lighting system for day/night cycle and light source objects (see lighting.Lighting) '''
+    perf.count('blits', lights.draw(surf, surf_size, time))
+
+def get_visible_range(surf_size):
+    ''' Returns (left, right) world x positions (in pixels) visible on a surface of surf_size (see utility.zoom_transform) '''
+    left = scroll +SCREEN_WIDTH//2 -surf_size[0]//2
+    return left, left +surf_size[0]
+
+def get_visible_chunks(surf_size):
+    ''' Returns range of chunk numbers visible on a surface of surf_size (and the chunks next to them, 
+    whose decor can reach into view) '''
+    left, right = get_visible_range(surf_size)
+    return range(int(left//CHUNK_SIZE) -1, int(right//CHUNK_SIZE) +2)
+
+def draw_objects(surf, surf_size):
+    ''' draw objects which are visible (see get_visible_range), in layer order. 
+    Tile objects (trees, grass, rocks) are drawn with their chunk's pre-rendered layers (see chunk_cache) '''
+    chunks = get_visible_chunks(surf_size)
+    left, right = get_visible_range(surf_size)
+    left, right = left -CULL_MARGIN, right +CULL_MARGIN
+    drawn = culled = 0
+    for name, layer in ((None, bg_objs), ('trees', interactable_bg_objs), (None, playable_objs), ('grass', fg_objs), ('rocks', interactable_fg_objs)):
+        decor = set() # chunks whose pre-rendered layer has been drawn
+        for o in layer:
+            if o.tile != None: 
+                # draw the chunk's pre-rendered layer in place of its first tile object (in list order)
+                if o.chunk not in decor:
+                    decor.add(o.chunk)
+                    if o.chunk in chunks: drawn += chunk_cache.draw(surf, scroll, surf_size, name, [o.chunk])
+                continue
+            if o.x < right and o.x +o.width > left:
+                o.draw(surf, scroll, surf_size)
+                drawn += 1
+            else: culled += 1
+    perf.count('blits', drawn)
+    perf.count('drawn', drawn)
+    perf.count('culled', culled)
 
 def draw_level():
     ''' use object list to draw everthing to the screen '''
     surf_size = (int(SCREEN_WIDTH/zoom), int(SCREEN_HEIGHT/zoom))
-    surf = pygame.Surface((surf_size[0], surf_size[1]))
+    surf = target # drawn at RENDER_PIXEL_SIZE, see render.RenderTarget
+    # zoomed out to a zoom level, draw with images scaled for the level instead of drawing a larger frame and scaling it down
+    # (between levels, and zoomed in, where the frame is smaller than the screen, the frame is scaled)
+    if DISCRETE_ZOOM and zoom in ZOOM_LEVELS and zoom < 1: pixel_size = RENDER_PIXEL_SIZE/zoom
+    else: pixel_size = RENDER_PIXEL_SIZE
+    surf.set_pixel_size(pixel_size)
+    surf.resize(surf_size)
+    surf.begin_frame((scroll, zoom), full=DEBUG) # with DIRTY_RECTS, only what changed is redrawn unless the view moved
 
     # draw background 
-    surf.fill((155,205,240)) 
-    # sun.x = int(SCREEN_WIDTH//2 - TILE_SIZE*2) 
-    sun.x = time/(SECONDS_PER_DAY/2)*SCREEN_WIDTH
-    sun.y = int(GROUND_Y -(SCREEN_HEIGHT+sun.height)*math.sin(2*math.pi*time/SECONDS_PER_DAY))
-    x, y = utility.zoom_transform(surf_size, (sun.x,sun.y))
-    surf.blit(sun.img, (x, y)) 
+    with perf.phase('sky'):
+        surf.fill((155,205,240)) 
+        # sun.x = int(SCREEN_WIDTH//2 - TILE_SIZE*2) 
+        sun.x = time/(SECONDS_PER_DAY/2)*SCREEN_WIDTH
+        sun.y = int(GROUND_Y -(SCREEN_HEIGHT+sun.height)*math.sin(2*math.pi*time/SECONDS_PER_DAY))
+        x, y = utility.zoom_transform(surf_size, (sun.x,sun.y))
+        surf.blit(sun.img, (x, y)) 
 
-    draw_ground(surf,surf_size) # draw ground
+    with perf.phase('ground'):
+        draw_ground(surf,surf_size) # draw ground
+
+    with perf.phase('clouds'):
+        perf.count('blits', clouds.draw(surf, scroll, surf_size, world.get_ticks())) # pre-rendered strips (see sky.py)
 
     # draw objects
-    for o in bg_objs+interactable_bg_objs+playable_objs+fg_objs+interactable_fg_objs: 
-        o.draw(surf, scroll, surf_size)
-    controller.draw(surf, scroll, surf_size)
+    with perf.phase('objects'):
+        draw_objects(surf, surf_size)
+        controller.draw(surf, scroll, surf_size)
 
-    draw_lighting(surf,surf_size) # draw darkness for night 
+    with perf.phase('lighting'):
+        draw_lighting(surf,surf_size) # draw darkness for night 
 
     if DEBUG:  # TODO: constant sizing for hud when zooming
         # display chunk borders
         for chunk in range(int(controller.x//CHUNK_SIZE -RENDER_DISTANCE), int(controller.x//CHUNK_SIZE +RENDER_DISTANCE+1)):
-            text = pygame.font.Font(None, 24).render(str(chunk), True, (0,0,0))
+            text = DEBUG_FONT.render(str(chunk), True, (0,0,0))
             x, y = utility.zoom_transform(surf_size, (chunk*CHUNK_SIZE -scroll +CHUNK_SIZE//2, 0)) # y unneeded
             surf.blit(text, (x,TILE_SIZE)) # chunk number text
             x, y = utility.zoom_transform(surf_size, (chunk*CHUNK_SIZE -scroll, 0)) # y unneeded
-            pygame.draw.line(surf, (0,0,0), (x,0),(x,surf_size[1]))
+            surf.draw_line((0,0,0), (x,0),(x,surf_size[1]))
 
-    # scale screen by zoom factor
-    scaled = pygame.transform.scale(surf, (SCREEN_WIDTH, SCREEN_HEIGHT))
-    screen.blit(scaled, (0,0))
+    # scale screen by zoom factor (and RENDER_PIXEL_SIZE)
+    with perf.phase('scale'):
+        rects = surf.end_frame() # regions redrawn (None if the whole frame was)
+        hud_rects = hud_layer.update(controller) # handles HUD for all possible states, redrawn when it changes
+        rects = surf.present(screen, rects, hud_rects)
 
     # draw HUD
-    controller.draw_hud(screen) # handles HUD for all possible states 
+    with perf.phase('hud'):
+        perf.count('blits', hud_layer.draw(screen, rects))
     if DEBUG:
         # display mouse position
         pos = pygame.mouse.get_pos()
         pos = utility.zoom_scale(zoom, pos)
-        text = pygame.font.Font(None, 24).render(f'mouse pos: ({pos[0]+scroll}, {pos[1]})', True, (0,0,0))
+        text = DEBUG_FONT.render(f'mouse pos: ({pos[0]+scroll}, {pos[1]})', True, (0,0,0))
         screen.blit(text, (TILE_SIZE, TILE_SIZE*2))
         # display scroll
-        text = pygame.font.Font(None, 24).render(f'scroll: {scroll}', True, (0,0,0))
+        text = DEBUG_FONT.render(f'scroll: {scroll}', True, (0,0,0))
         screen.blit(text, (TILE_SIZE, TILE_SIZE*3))
         # display zoom
-        text = pygame.font.Font(None, 24).render(f'zoom: {zoom}', True, (0,0,0))
+        text = DEBUG_FONT.render(f'zoom: {zoom}', True, (0,0,0))
         screen.blit(text, (TILE_SIZE, TILE_SIZE*4))
         if controller.player != None:
             # display stamina
-            text = pygame.font.Font(None, 24).render(f'stamina: {round(controller.player.stamina,1)}', True, (0,0,0))
+            text = DEBUG_FONT.render(f'stamina: {round(controller.player.stamina,1)}', True, (0,0,0))
             screen.blit(text, (TILE_SIZE, TILE_SIZE*5))
+        # display frame profiler (phase times and counts)
+        perf.draw_overlay(screen, DEBUG_FONT, (SCREEN_WIDTH -profiler.GRAPH_WIDTH -TILE_SIZE, TILE_SIZE))
+    return rects
 
 #3 CREATE/LOAD WORLD
-try:
+seed = int(sys.argv[sys.argv.index('--seed')+1]) if '--seed' in sys.argv else None # random if None
+save_dir = SAVE_DIR if seed == None else f'{SAVE_DIR}-{seed}' # a seeded world never replaces the saved world
+if save.exists(save_dir):
     # LOAD WORLD
-    utility.load_json('save')
-    scroll = 0 # in pixels
-    day = 0
-    start_time = 0 # in seconds, resets each day
-    zoom = 1
-    chunk_data = {}
+    chunk_data, state = save.load_world(save_dir)
+    scroll = state['scroll'] # in pixels
+    ticks = state['ticks']
+    start_time = state['start_time'] # in seconds, resets each day
+    zoom = state['zoom']
 
-except:
+else:
     # GENERATE NEW WORLD
-    chunk_data = generate.generate_world()
+    chunk_data = generate.generate_world(seed)
     # print(generate.continent_sizes)
     # print(generate.ocean_sizes)
     # print('total chunks',sum(generate.continent_sizes.values())+sum(generate.ocean_sizes.values()))
 
     # set scroll to starting camp location
-    for c,size in generate.continent_sizes.items():
-        if 'north' in generate.CONTINENTS[c] and 'west' in generate.CONTINENTS[c]: continent_size = size 
+    continent_size = generate.continent_sizes[generate.get_starting_continent()]
     scroll = (generate.WORLD_SIZE//4 -generate.ocean_sizes['artic']//2 -continent_size//2) *CHUNK_SIZE # in pixels
-    day = 0
+    ticks = 0
     start_time = 0 # in seconds, resets each day
     zoom = 1
+day = ticks/FPS//SECONDS_PER_DAY
 
 #4 CREATE OBJECTS
 # create sun
-sun = utility.load_image('img/envir/sun.png')
+sun = images.get('img/envir/sun.png')
 w, h = sun.get_size()
 sun = obj.Object(0, 0, w, h, sun)
 
-# create world objects
-FILENAME_TO_IMGS = {}
-bg_objs, interactable_bg_objs, playable_objs, fg_objs, interactable_fg_objs = generate.create_objects(chunk_data, scroll)
+# create world objects (for chunks near the screen, see streamer)
+bg_objs, interactable_bg_objs, playable_objs, fg_objs, interactable_fg_objs = [], [], [], [], []
+animals = fauna.AnimalSystem() # every Animal, updated at once
+spatial_index = spatial.SpatialIndex(CHUNK_SIZE, animals) # interactable and playable objects by position
+lights = lighting.Lighting(LIGHT_MASK, DEF_LIGHT_SCALE, LIGHTMAP_PIXEL_SIZE, DAYLIGHT_STEP) # light sources (objects tagged 'light')
+people = vitals.VitalsSystem() # every Person's health, hunger and stamina, updated at once
+chunk_cache = chunkcache.ChunkLayerCache(CHUNK_CACHE_BUDGET) # pre-rendered ground and decor for each chunk
+clouds = sky.CloudLayer(generate.world_seed, generate.WORLD_SIZE, RENDER_DISTANCE) # strips as wide as the widest view
+target = render.RenderTarget(RENDER_PIXEL_SIZE, DIRTY_RECTS) # the world is drawn on this, then scaled to the screen
+hud_layer = hud.HudLayer((SCREEN_WIDTH, SCREEN_HEIGHT)) # cached HUD, blitted onto the screen
+broadphase = spatial.SweepAndPrune(BROADPHASE_MARGIN) # objects touching each Person
+streamer = streaming.ChunkStreamer(STREAM_DISTANCE)
+streamer.update(scroll +SCREEN_WIDTH//2)
 
 #5 GAME     
 controller = obj.Controller(scroll)
-while 1:
-    # update time
-    clock.tick(FPS)
-    time = pygame.time.get_ticks()/1000%SECONDS_PER_DAY +start_time
-    day = pygame.time.get_ticks()/1000//SECONDS_PER_DAY
-    for event in pygame.event.get(): 
-        # toggle debug mode
-        if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB: DEBUG = not DEBUG
-
-    # update objects
-    zoom = controller.update(playable_objs, interactable_fg_objs+interactable_bg_objs, scroll, zoom)
-    data = {}
-    for o in interactable_fg_objs:
-        if type(o) == obj.Animal: # update Animals
-            o.update()
-    for p in playable_objs: # update Persons
-        data.update(p.update(interactable_bg_objs, interactable_fg_objs))
-    
-    # create and destroy new objects as needed
-    if data:
-        for o in data['destroy']:  #TODO
-            try: interactable_bg_objs.remove(o)
-            except: interactable_fg_objs.remove(o)
-        for l in data['create']: 
-            o, layer = l
-            if layer == 'bg': interactable_bg_objs.append(o)
-            elif layer == 'fg': interactable_fg_objs.append(o)
-            else: playable_objs.append(o)     
-
-    # draw world
-    draw_level()
-
-    # quit
-    if pygame.event.get(pygame.QUIT):
-        pygame.quit()
-        sys.exit()
-
-    pygame.display.update() # Update screen 
\ No newline at end of file
+world = World(start_time, ticks)
+time = ticks/FPS%SECONDS_PER_DAY +start_time
+
+def get_save_state():
+    ''' Returns dict of game state saved with the world '''
+    return {'scroll': scroll, 'ticks': world.ticks, 'start_time': world.start_time, 'zoom': zoom}
+
+def save_game(path=None, wait=True):
+    ''' save changed chunks and live objects (Persons, Structures, etc.) to path (see save.py, DEFAULT: save_dir) 
+    wait - bool, wait for the save to be written (on autosaver's thread) '''
+    if path == None: path = save_dir
+    autosaver.save(path, chunk_data, get_save_state(), streamer, wait)
+
+def get_image_report():
+    ''' Returns str, how long preloading images took (see assets.AssetManager.preload) '''
+    return f'{len(images)} images loaded in {images.load_time:.2f}s, {images.bundled} from {assets.BUNDLE_FILE}'
+
+def run(args=[]):
+    ''' main game loop (draws to the window) or, in HEADLESS mode, a simulation without drawing
+    args (command line):
+        --headless - run without a window
+        --seed N - world seed for generating a new world, saved to SAVE_DIR-N (loaded from there once it's been saved,
+            delete SAVE_DIR-N to generate it again). The world in SAVE_DIR is never replaced
+        --ticks N, --days N - number of ticks/days to simulate in HEADLESS mode (DEFAULT: 1 day)
+        --trace FILE - write a per-frame csv trace of phase times and counts to FILE
+        --save - save the world after simulating in HEADLESS mode
+        --native - draw the world at the art's resolution instead of the screen's (see NATIVE_RENDER)
+        --zoom-levels - zoom between ZOOM_LEVELS (see DISCRETE_ZOOM)
+        --dirty-rects - redraw and update only regions of the screen which changed (see DIRTY_RECTS) '''
+    if '--trace' in args: perf.start_trace(args[args.index('--trace')+1])
+    if HEADLESS:
+        print(f'started in {perf_counter()-START_TIME:.2f}s ({get_image_report()})')
+        ticks = FRAMES_PER_DAY
+        if '--ticks' in args: ticks = int(args[args.index('--ticks')+1])
+        if '--days' in args: ticks = int(float(args[args.index('--days')+1])*FRAMES_PER_DAY)
+        start = pygame.time.get_ticks()
+        for i in range(ticks):
+            world.run_ticks(1)
+            perf.end_frame()
+        elapsed = (pygame.time.get_ticks()-start)/1000
+        print(f'simulated {ticks} ticks ({ticks/FRAMES_PER_DAY:.2f} days) in {elapsed:.2f}s ' \
+            f'({ticks/max(elapsed,.001):.0f} ticks/s)')
+        if '--save' in args: save_game()
+        return
+
+    global DEBUG
+    first_frame = True
+    while 1:
+        clock.tick(FPS)
+        for event in pygame.event.get(): 
+            # toggle debug mode
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB: DEBUG = not DEBUG
+            # start/stop per-frame trace
+            if event.type == pygame.KEYDOWN and event.key == TRACE_KEY: 
+                if perf.trace == None: 
+                    os.makedirs(TRACE_DIR, exist_ok=True)
+                    perf.start_trace(os.path.join(TRACE_DIR, f'trace_{strftime("%Y%m%d_%H%M%S")}.csv'))
+                else: perf.stop_trace()
+            # record frames with cProfile
+            if event.type == pygame.KEYDOWN and event.key == PROFILE_KEY: 
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                perf.capture(PROFILE_FRAMES, os.path.join(PROFILE_DIR, f'profile_{strftime("%Y%m%d_%H%M%S")}'))
+            # save world
+            if event.type == pygame.KEYDOWN and event.key == SAVE_KEY: save_game(wait=False)
+
+        world.run_ticks(1) # update objects
+        autosaver.update(pygame.time.get_ticks()/1000, save_dir, chunk_data, get_save_state(), streamer)
+
+        # draw world
+        rects = draw_level()
+        perf.end_frame()
+
+        # quit
+        if pygame.event.get(pygame.QUIT):
+            if perf.capture_profile != None: perf.end_capture()
+            perf.stop_trace()
+            save_game()
+            pygame.quit()
+            sys.exit()
+
+        if rects == None: pygame.display.update() # Update screen
+        elif rects: pygame.display.update(rects) # only what changed (see DIRTY_RECTS)
+        if first_frame:
+            print(f'first frame in {perf_counter()-START_TIME:.2f}s ({get_image_report()})')
+            first_frame = False 
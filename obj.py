@@ -4,14 +4,32 @@
 import pygame 
 import math
 import random
+import weakref
 import numpy
 import utility
+import hud
 
 DEF_FRAMES = 1 # default number of animation frames
 DEF_ANIMATION_TIME_SCALE = .1 # default time scale of animations
 DEF_HEALTH = 100 # default Object health
 MAX_CLICK_SPEED = 15 # in frames, minimum time between registering clicks when interacting with UI
 DEF_BUILD_TIME = 60 # in frames, time it takes to build a structure
+FRAMES = weakref.WeakKeyDictionary() # maps sprite sheet to {(width, height, facing): list of frames} (see get_frame)
+
+def get_frame(sheet, size, i, facing='right'):
+    ''' Returns animation frame i (Surface) of a sprite sheet with frames of size (width, height), 
+    flipped if facing is 'left'. The frames are cut from each sheet (and flipped) once, 
+    and shared by every object using the sheet '''
+    frames = FRAMES.setdefault(sheet, {})
+    key = (size[0], size[1], facing)
+    if key not in frames:
+        from main import SPRITESHEET_SPACING
+        w, h = size
+        n = max(1, (sheet.get_width() +SPRITESHEET_SPACING)//(w +SPRITESHEET_SPACING))
+        # copies, so frames don't keep their sheet alive
+        frames[key] = [sheet.subsurface((j*(w +SPRITESHEET_SPACING),0,w,h)).copy() for j in range(n)]
+        if facing == 'left': frames[key] = [pygame.transform.flip(f,1,0) for f in frames[key]]
+    return frames[key][i]
 
 class Controller(object):
     def __init__(self, scroll):
@@ -20,6 +38,8 @@ class Controller(object):
         from main import PIXEL_SIZE
         self.ZOOM_SPEED = 1.02
         self.PLAYER_ZOOM = 1.25
+        self.zoom_level = None # zoom level zoom is moving to (with main.DISCRETE_ZOOM)
+        self.zoom_keys = (False, False) # whether W and S were pressed last update (to step one level per press)
         self.scroll_speed = PIXEL_SIZE*2
         self.speed = self.scroll_speed
         self.x = scroll
@@ -28,15 +48,17 @@ class Controller(object):
 
         # for selections and selector animation
         self.selection = None
-        self.sprite_sheet = utility.load_image('img/hud/selector.png')
+        from main import images
+        self.sprite_sheet = images.get('img/hud/selector.png')
         from main import ANIMATION_DATABASE
         self.width, self.height = ANIMATION_DATABASE['selector']
         self.frames = 6
         self.frame_num = 0
         self.animation_time_scale = .1
     
-    def update(self, playable_objs, interactable_objs, scroll, zoom):
-        ''' Returns new zoom value (for screen) '''
+    def update(self, objects, scroll, zoom):
+        ''' objects - spatial.SpatialIndex of interactable and playable objects
+        Returns new zoom value (for screen) '''
         if self.player != None and self.player.state != 'player':
             # set state back
             self.state = 'scroll'
@@ -45,7 +67,7 @@ class Controller(object):
         
         if self.state == 'player': 
             # if a player is being controlled
-            return self.PLAYER_ZOOM
+            return self.get_player_zoom()
 
         # HANDLE MOUSE INPUTS
         mouse = pygame.mouse.get_pressed()
@@ -53,28 +75,24 @@ class Controller(object):
         mouse_pos = utility.zoom_scale(zoom, mouse_pos)
         if mouse[2]:
             # play as specific Person (right click)
-            for obj in playable_objs:
-                if mouse_pos[0]+scroll >= obj.x and mouse_pos[0]+scroll < obj.x + obj.width \
-                    and mouse_pos[1] >= obj.y and mouse_pos[1] < obj.y + obj.height:
-                    if type(obj) == Person:
-                        if self.selection != None: self.deselect()
-                        self.play_as(obj)
-                        return self.PLAYER_ZOOM
+            for obj in objects.query_point(mouse_pos[0]+scroll, mouse_pos[1]):
+                if type(obj) == Person:
+                    if self.selection != None: self.deselect()
+                    self.play_as(obj)
+                    return self.get_player_zoom()
         if mouse[0]:
             # select an object (left click)
-            for obj in interactable_objs+playable_objs:
-                if mouse_pos[0]+scroll >= obj.x and mouse_pos[0]+scroll < obj.x + obj.width \
-                    and mouse_pos[1] >= obj.y and mouse_pos[1] < obj.y + obj.height:
-                    if type(obj) == Person:
-                        self.select(obj)
-                        return zoom
-                    # do an action with selected person
-                    if self.selection != None and type(self.selection) == Person:
-                        if (type(obj) == Item and self.selection.item == None) or \
-                            ('item' in obj.tags and len(self.selection.inventory) < self.selection.inventory_space):
-                            self.selection.task = 'pick_up'
-                            self.selection.pursue(obj)
-                            self.deselect()
+            for obj in objects.query_point(mouse_pos[0]+scroll, mouse_pos[1]):
+                if type(obj) == Person:
+                    self.select(obj)
+                    return zoom
+                # do an action with selected person
+                if self.selection != None and type(self.selection) == Person:
+                    if (type(obj) == Item and self.selection.item == None) or \
+                        ('item' in obj.tags and len(self.selection.inventory) < self.selection.inventory_space):
+                        self.selection.task = 'pick_up'
+                        self.selection.pursue(obj)
+                        self.deselect()
 
         # HANDLE KEYBOARD INPUTS
         pressed = pygame.key.get_pressed()
@@ -93,19 +111,45 @@ class Controller(object):
                 self.x += self.speed
 
         # zoom
-        if pressed[pygame.K_w]:
-            from main import MIN_ZOOM
-            if zoom*(2-self.ZOOM_SPEED) > MIN_ZOOM: zoom *= (2-self.ZOOM_SPEED)
-            else: zoom = MIN_ZOOM
-        if pressed[pygame.K_s]:
-            from main import MAX_ZOOM
-            if zoom*self.ZOOM_SPEED < MAX_ZOOM: zoom *= self.ZOOM_SPEED
-            else: zoom = MAX_ZOOM
+        from main import DISCRETE_ZOOM
+        if DISCRETE_ZOOM: zoom = self.step_zoom(pressed, zoom)
+        else:
+            if pressed[pygame.K_w]:
+                from main import MIN_ZOOM
+                if zoom*(2-self.ZOOM_SPEED) > MIN_ZOOM: zoom *= (2-self.ZOOM_SPEED)
+                else: zoom = MIN_ZOOM
+            if pressed[pygame.K_s]:
+                from main import MAX_ZOOM
+                if zoom*self.ZOOM_SPEED < MAX_ZOOM: zoom *= self.ZOOM_SPEED
+                else: zoom = MAX_ZOOM
 
         from main import clamp_scroll
         clamp_scroll(self) # set scroll to controller location
         return zoom # update zoom
     
+    def step_zoom(self, pressed, zoom):
+        ''' zoom with main.DISCRETE_ZOOM: W and S choose the next zoom level out/in (one level per press),
+        and zoom moves towards the level (at ZOOM_SPEED) until it's on it.
+        Returns new zoom value '''
+        from main import ZOOM_LEVELS
+        if self.zoom_level == None: self.zoom_level = utility.get_zoom_level(zoom)
+        i = ZOOM_LEVELS.index(self.zoom_level)
+        if pressed[pygame.K_w] and not self.zoom_keys[0]: i = max(0, i-1)
+        if pressed[pygame.K_s] and not self.zoom_keys[1]: i = min(len(ZOOM_LEVELS)-1, i+1)
+        self.zoom_keys = (pressed[pygame.K_w], pressed[pygame.K_s])
+        self.zoom_level = ZOOM_LEVELS[i]
+        if zoom < self.zoom_level: return min(zoom*self.ZOOM_SPEED, self.zoom_level)
+        if zoom > self.zoom_level: return max(zoom*(2-self.ZOOM_SPEED), self.zoom_level)
+        return zoom
+
+    def get_player_zoom(self):
+        ''' Returns zoom when playing as a Person (the nearest zoom level with main.DISCRETE_ZOOM) '''
+        from main import DISCRETE_ZOOM
+        if DISCRETE_ZOOM: 
+            self.zoom_level = utility.get_zoom_level(self.PLAYER_ZOOM)
+            return self.zoom_level
+        return self.PLAYER_ZOOM
+
     def deselect(self):
         self.selection.selected = False
         self.selection = None
@@ -119,22 +163,35 @@ class Controller(object):
         self.state = 'player'
         self.player = obj
 
+    def release(self, obj):
+        ''' stop playing as and selecting obj (e.g., when it dies) '''
+        if obj is self.player:
+            self.state = 'scroll'
+            self.x = obj.x
+            self.player = None
+        if obj is self.selection: self.deselect()
+
     def draw(self, surface, scroll, surf_size):
         if self.selection != None:
             self.update_frame()
             x, y = utility.zoom_transform(surf_size, (self.selection.x, self.selection.y))
             surface.blit(self.img, (x + self.selection.width//2 -self.width//2 -scroll, y - self.height))
         
+    def get_hud_key(self, pos):
+        ''' Returns what the HUD shows (changes when it needs redrawing, see hud.HudLayer), pos - mouse position '''
+        if self.state == 'player': return self.player.get_hud_key(pos)
+        if self.selection != None: return self.selection.get_hud_key(pos)
+        return None
+
     def draw_hud(self, surface):
         if self.selection != None or self.state == 'player':
             if self.state == 'player': self.player.draw_hud(surface) # playing as person
             else: self.selection.draw_hud(surface) # person is selected
 
     def update_frame(self):
-        from main import SPRITESHEET_SPACING
         if math.ceil(self.frame_num) >= self.frames:
             self.frame_num = 0
-        self.img = self.sprite_sheet.subsurface((math.ceil(self.frame_num)*(self.width+SPRITESHEET_SPACING),0,self.width,self.height))
+        self.img = get_frame(self.sprite_sheet, (self.width, self.height), math.ceil(self.frame_num))
         self.frame_num += self.animation_time_scale
 
 
@@ -144,10 +201,10 @@ class Object(object):
         item (held items and inventory items)
         wood (made of/can cut wood)
         build (held item that can build structures)
-        cloud (for cloud movement)
         fearful (animals that run from people)
-    id attribute is for items which can be in a person's inventory '''
-    def __init__(self,x,y,x_size,y_size,img, id='', health=DEF_HEALTH, loot=[], tags=[]):
+    id attribute is for items which can be in a person's inventory 
+    name attribute is the object's image name (for writing the object back to chunk data) '''
+    def __init__(self,x,y,x_size,y_size,img, id='', name='', health=DEF_HEALTH, loot=[], tags=[]):
         self.width = x_size
         self.height = y_size
         self.rect = pygame.Rect(x,y,self.width,self.height)
@@ -160,14 +217,13 @@ class Object(object):
         self.health = self.max_health
         self.loot = loot # list of item ids to be created as loot
         self.id = id
+        self.name = name
+        self.chunk = None # chunk number, for objects created from a chunk's tile lists (trees, grass, rocks)
+        self.tile = None # tile number in chunk
 
     def draw(self, surface, scroll, surf_size):
         x, y = utility.zoom_transform(surf_size, (self.x, self.y))
-        if 'cloud' in self.tags:
-            from main import FPS, PARALAX_FACTOR
-            surface.blit(self.img, (x - scroll*PARALAX_FACTOR +pygame.time.get_ticks()//FPS, y))
-        else:
-            surface.blit(self.img, (x - scroll, y))
+        surface.blit(self.img, (x - scroll, y))
 
     def damage(self,strength=1):
         ''' returns objects to be destroyed/created '''
@@ -187,10 +243,10 @@ class Object(object):
 
 class Entity(Object):
     ''' Objects that are animated '''
-    def __init__(self,x,y,x_size,y_size, sprite_sheet, id='', health=DEF_HEALTH, loot=[], tags=[], \
+    def __init__(self,x,y,x_size,y_size, sprite_sheet, id='', name='', health=DEF_HEALTH, loot=[], tags=[], \
         animated=False, speed='DEF', state='idle',facing='right',\
         frames=DEF_FRAMES,animation_time_scale=DEF_ANIMATION_TIME_SCALE):
-        super().__init__(x,y,x_size,y_size, sprite_sheet, id=id, health=health, loot=loot, tags=tags)
+        super().__init__(x,y,x_size,y_size, sprite_sheet, id=id, name=name, health=health, loot=loot, tags=tags)
         if speed == 'DEF':
             from main import PIXEL_SIZE
             self.speed = PIXEL_SIZE*.75
@@ -211,13 +267,10 @@ class Entity(Object):
         surface.blit(self.img, (x - scroll, y))
     
     def update_frame(self):
-        from main import SPRITESHEET_SPACING
         if not self.animated or math.ceil(self.frame_num) >= self.frames:
             self.frame_num = 0
-        self.img = self.sprite_sheet.subsurface((math.ceil(self.frame_num)*(self.width+SPRITESHEET_SPACING),0,self.width,self.height))
+        self.img = get_frame(self.sprite_sheet, (self.width, self.height), math.ceil(self.frame_num), self.facing)
         self.frame_num += self.animation_time_scale
-        if self.facing == 'left':
-            self.img = pygame.transform.flip(self.img,1,0)
 
 
 class Item(Entity):
@@ -233,44 +286,35 @@ class Item(Entity):
     def draw(self, surface, scroll, surf_size):
         if self.on_ground:
             x, y = utility.zoom_transform(surf_size, (self.x, self.y))
-            if self.facing == 'right': surface.blit(self.ground_img, (x - scroll, y))
-            else: surface.blit(utility.flip_img(self.ground_img), (x - scroll, y))
+            surface.blit(get_frame(self.ground_img, self.ground_img.get_size(), 0, self.facing), (x - scroll, y))
 
 
 class Animal(Entity):
-    ''' Animal with various behaviors 
+    ''' Animal with various behaviors (updated for every Animal at once by a fauna.AnimalSystem it's added to)
     possible tags: fearful
     possible states: idle, wander, flee
     '''
-    def __init__(self,x,y,x_size,y_size, sprite_sheet, \
+    # stored in the AnimalSystem's arrays while the Animal is added to one (see utility.Field)
+    x, speed, state, facing, animated = utility.Field(), utility.Field(), utility.Field(), utility.Field(), utility.Field()
+    wander_num, wander_time, flee_obj = utility.Field(), utility.Field(), utility.Field()
+
+    def __init__(self,x,y,x_size,y_size, sprite_sheet, name='', \
         tags=[], loot=[], speed='DEF', state='wander',facing='right',frames=DEF_FRAMES,animation_time_scale=DEF_ANIMATION_TIME_SCALE, health=DEF_HEALTH):
-        super().__init__(x,y,x_size,y_size, sprite_sheet, health=health, loot=loot, tags=tags, \
+        self.system, self.slot = None, None # fauna.AnimalSystem and slot of its arrays
+        super().__init__(x,y,x_size,y_size, sprite_sheet, name=name, health=health, loot=loot, tags=tags, \
             speed=speed, state=state, facing=facing, frames=frames,animation_time_scale=animation_time_scale)
         self.wander_time = 120
         self.wander_num = 0 
         self.flee_obj = None
 
-    def update(self):
-        if self.state == 'wander': self.wander()
-        elif self.state == 'flee': 
-            self.flee()
-
-    def wander(self):
-        # try to initiate wander
-        if not self.animated:
-            from main import FPS
-            if pygame.time.get_ticks()%FPS == 0 and random.random() < .05:
-                self.animated = True
-                if random.random() < .5: self.facing = 'right'
-                else: self.facing = 'left'
+    @property
+    def rect(self):
+        ''' pygame.Rect at x '''
+        return pygame.Rect(self.x, self.y, self.width, self.height)
 
-        # while actively wandering
-        if self.animated:
-            self.wander_num += random.randint(1,2)
-            if self.wander_num >= self.wander_time: self.set_state('wander')
-            if self.facing == 'right': self.x += self.speed
-            else: self.x -= self.speed
-            self.rect.x = self.x
+    @rect.setter
+    def rect(self, rect):
+        pass # follows x
 
     def set_state(self, state, obj=None):
         self.state = state
@@ -282,26 +326,20 @@ class Animal(Entity):
             self.flee_obj = obj
             self.animated = True
 
-    def flee(self):
-        direction = numpy.sign(self.flee_obj.x +self.flee_obj.width//2 - (self.x +self.width//2)) # direction of flee object relative to self
-        # update direction for sprite
-        if direction > 0: self.facing = 'left'
-        else: self.facing = 'right'
-        self.x -= direction*self.speed # run away!
-
-        if abs(self.flee_obj.x +self.flee_obj.width//2 - (self.x +self.width//2)) > self.flee_obj.startle_dis: 
-            # got away!
-            from main import FPS
-            if random.random() < (1-self.flee_obj.startle_prob)/FPS: self.set_state('wander')
-
 
 class Person(Entity):
     ''' Basic playable character 
     possible states: player, idle, pursue, task
-    possible tasks: pick_up, collect '''
-    def __init__(self,x,y,x_size,y_size, sprite_sheet, \
+    possible tasks: pick_up, collect
+    vital stats (health, hunger, stamina) are advanced for every Person at once by a vitals.VitalsSystem it's added to '''
+    # stored in the VitalsSystem's arrays while the Person is added to one (see utility.Field)
+    health, hunger, max_hunger, stamina, max_stamina = utility.Field(), utility.Field(), utility.Field(), utility.Field(), utility.Field()
+    gait = utility.Field()
+
+    def __init__(self,x,y,x_size,y_size, sprite_sheet, name='', \
         speed='DEF', state='idle',facing='right',frames=6,animation_time_scale=DEF_ANIMATION_TIME_SCALE, health=DEF_HEALTH):
         from main import PIXEL_SIZE, TILE_SIZE, FPS, FRAMES_PER_DAY
+        self.system, self.slot = None, None # vitals.VitalsSystem and slot of its arrays
         # set speed (pixels per frame)
         if speed == 'DEF':
             from main import PIXEL_SIZE
@@ -317,6 +355,7 @@ class Person(Entity):
         self.max_hunger = FRAMES_PER_DAY*3 # frames before dying of hunger
         self.hunger = 0 # how hungry the Person is. Person dies at self.max_hunger frames
         self.health = health
+        self.gait = None # how a player moved the Person this tick: idle, walk or run (see vitals.GAITS)
         self.click_time = 0 # time left before next click is registered (for UI)
 
         self.selected = False # bool, True if person is currently selected by the controller
@@ -328,29 +367,24 @@ class Person(Entity):
         self.dropped = False # whether an item has been dropped with the Q key
         self.struct = None # Structure to display inventory for
         self.valid_structures = {} # maps structure which are possible to build at the current x location to dict of materials needed
+        self.hud_version = 0 # changes with inventory, recipes and valid_structures (see get_hud_key)
+        self.contacts = [] # objects which may be touching the Person, in the order they were added (set each frame, see spatial.SweepAndPrune)
             
-        super().__init__(x,y,x_size,y_size, sprite_sheet, \
+        super().__init__(x,y,x_size,y_size, sprite_sheet, name=name, \
             state=state, facing=facing, frames=frames,animation_time_scale=animation_time_scale)
         self.pursue_obj = None
         self.startle_dis = TILE_SIZE*10 # distance at which animals will notice person and flee (if fearful)
         self.startle_prob = .8 # probability animal is startled
 
-    def update(self, interactable_bg_objs, interactable_fg_objs):
+    def update(self, objects):
         ''' called every frame by main game loop
+        objects - spatial.SpatialIndex of interactable and playable objects
         returns objects to be destroyed/created or an empty dict '''
         data = {'destroy': [], 'create': []}
-        
-        # UPDATE STATS (e.g., health, hunger, stamina)
-        if self.hunger < self.max_hunger: self.hunger += 1 # get more hungry (if still alive)
-        else:  
-            from main import FPS
-            self.health -= (self.hunger-self.max_hunger-1)/FPS # decrease health by 1 each second at max hunger (quicker if walking or running)
-        if self.health < 0: return self.die() # die if out of health
-
-        if self.stamina > self.max_stamina: self.stamina = self.max_stamina # cap stamina at maximum (so we don't have to elsewhere)
+        # vital stats (e.g., health, hunger, stamina) are updated by vitals.VitalsSystem
 
         # ANIMAL INTERACTIONS
-        for obj in interactable_fg_objs:
+        for obj in objects.query_range(self.x -self.startle_dis, self.x +self.startle_dis +1):
             if type(obj) == Animal and 'fearful' in obj.tags and abs(obj.x-self.x) <= self.startle_dis:
             # make animals flee if startled
                 if random.random() < self.startle_prob: obj.set_state('flee', self)
@@ -367,16 +401,16 @@ class Person(Entity):
                 return data
 
             # MOVEMENT INPUTS
-            # moving state, stamina, hunger
+            # moving state (gait sets stamina and hunger, see vitals.VitalsSystem)
             if not (pressed[pygame.K_a] or pressed[pygame.K_d]) \
                 or (pressed[pygame.K_a] and pressed[pygame.K_d]):
                 # idle
                 self.animated = False
-                self.stamina += self.stamina_regen['idle']
+                self.gait = 'idle'
             else: 
                 # moving
                 self.animated = True
-                self.hunger += 1 # hungry faster when walking
+                self.gait = 'walk'
             # movement
             if pressed[pygame.K_a]:
                 # run 
@@ -384,29 +418,23 @@ class Person(Entity):
                     # run
                     self.x -= self.run_speed
                     self.animation_time_scale = self.def_animation_time_scale*2
-                    if self.animated:
-                        self.stamina -= 1
-                        self.hunger += 1 # hungry even faster when running
+                    if self.animated: self.gait = 'run'
                 else:
                     # walk
                     self.x -= self.speed
                     self.animation_time_scale = self.def_animation_time_scale
                 if self.facing == 'right' and not pressed[pygame.K_d]: self.facing = 'left' # don't update direction if opposite key is still held
-                if self.animated: self.stamina += self.stamina_regen['walk']
             if pressed[pygame.K_d]:
                 if pressed[pygame.K_LSHIFT] and self.stamina -1 > 0:
                     # run
                     self.x += self.run_speed
                     self.animation_time_scale = self.def_animation_time_scale*2
-                    if self.animated:
-                        self.stamina -= 1
-                        self.hunger += 1 # hungry even faster when running
+                    if self.animated: self.gait = 'run'
                 else:
                     # walk
                     self.x += self.speed
                     self.animation_time_scale = self.def_animation_time_scale
                 if self.facing == 'left' and not pressed[pygame.K_a]: self.facing = 'right' # don't update direction if opposite key is still held
-                if self.animated: self.stamina += self.stamina_regen['walk']
             
             # MOUSE DEPENDENT INPUTS
             mouse = pygame.mouse.get_pressed()
@@ -433,7 +461,8 @@ class Person(Entity):
             # Structure inventory UI
             self.struct = None
             transfered = False
-            for obj in interactable_bg_objs:
+            self.rect.x = self.x # update rect position for collisions!
+            for obj in self.contacts:
                 if transfered: break
                 if type(obj) == Structure and obj.built == 1 and obj.inventory_space != 0 and self.rect.colliderect(obj.rect):
                     self.struct = obj
@@ -496,14 +525,11 @@ class Person(Entity):
             # pick up items
             self.rect.x = self.x # update rect position for collisions!
             if pressed[pygame.K_s]:
-                objects = interactable_fg_objs+interactable_bg_objs
-                objects.reverse() # reverse to pick up older items first
-                for obj in objects: 
-                    if self.rect.colliderect(obj.rect):
-                        if 'item' in obj.tags:
-                            new_data = self.pick_up(obj)
-                            data.update(new_data)
-                            break
+                for obj in reversed(self.contacts): # reverse to pick up newer items first
+                    if 'item' in obj.tags and self.rect.colliderect(obj.rect):
+                        new_data = self.pick_up(obj)
+                        data.update(new_data)
+                        break
 
             # use or drop held item
             if self.item != None:
@@ -512,20 +538,20 @@ class Person(Entity):
                     self.drop_held_item()
                 if pressed[pygame.K_SPACE]:
                     # use held item
-                    for obj in interactable_fg_objs+interactable_bg_objs:
-                        if self.rect.colliderect(obj.rect):
+                    for obj in self.contacts:
+                        if not self.rect.colliderect(obj.rect): continue
                         # person is touching an object
-                            if type(obj) == Animal:
-                                # damage an animal
-                                data.update(obj.damage())
-                            if 'wood' in obj.tags and 'wood' in self.item.tags:
-                                # destroy wood objects with wood-breaking tool (e.g., axe)
-                                data.update(obj.damage())
-                                break
-                            if 'build' in self.item.tags and type(obj) == Structure and obj.built < 1:
-                                # build structure with building tool (e.g., hammer)
-                                obj.build()
-                                break
+                        if type(obj) == Animal:
+                            # damage an animal
+                            data.update(obj.damage())
+                        if 'wood' in obj.tags and 'wood' in self.item.tags:
+                            # destroy wood objects with wood-breaking tool (e.g., axe)
+                            data.update(obj.damage())
+                            break
+                        if 'build' in self.item.tags and type(obj) == Structure and obj.built < 1:
+                            # build structure with building tool (e.g., hammer)
+                            obj.build()
+                            break
 
             self.clamp_scroll()
         return data # objects to be destroyed/created (dict {'destroy': [obj], 'create': [obj]})
@@ -558,6 +584,8 @@ class Person(Entity):
             if self.facing == 'right': self.item.x = self.x + self.width
             else: self.item.x = self.x - self.item.width
             self.item.rect.x = self.item.x
+            from main import spatial_index
+            spatial_index.move(self.item)
             self.item = None
 
     def update_inv(self, item_id, change):
@@ -572,6 +600,7 @@ class Person(Entity):
             elif new_quantity == 0: del self.inventory[item_id]
             else: return
         self.recipes = self.get_recipes() # update items which can be crafted
+        self.hud_version += 1
 
     def drop_inv_item(self, item_id):
         ''' Returns dict with object to be created '''
@@ -593,6 +622,7 @@ class Person(Entity):
         if direction > 0: self.facing = 'right'
         else: self.facing = 'left'
         self.x += direction*self.speed
+        self.rect.x = self.x
 
         if direction != numpy.sign(self.pursue_obj.x +self.pursue_obj.width//2 - (self.x +self.width//2)):
             # target has been reached
@@ -641,7 +671,7 @@ class Person(Entity):
         from generate import create_structure
         from main import TILE_SIZE, update_chunk_data
         struct = create_structure(struct_name, self.x -self.x%TILE_SIZE, built=0)
-        update_chunk_data(struct_name,struct.x,'structures')
+        update_chunk_data(struct_name,struct.x +struct.width//2,'structures') # chunk data uses Structure's center
         return {'create':[(struct, 'bg')], 'destroy':[]}
 
     def get_recipes(self):
@@ -680,6 +710,7 @@ class Person(Entity):
             valid = True
             for chunk in range(int(self.x//CHUNK_SIZE -1),int(self.x//CHUNK_SIZE +2)):
             # check chunk before and after current location as well
+                if chunk not in chunk_data: continue
                 for tup in chunk_data[chunk]['structures']:
                     if (self.x -self.x%TILE_SIZE +ANIMATION_DATABASE[struct][0]/2 > tup[1] -ANIMATION_DATABASE[tup[0]][0]/2  \
                         and self.x -self.x%TILE_SIZE +ANIMATION_DATABASE[struct][0]/2 < tup[1] +ANIMATION_DATABASE[tup[0]][0]/2) \
@@ -688,6 +719,7 @@ class Person(Entity):
                     # structure is in an invalid location 
                         valid = False
             if valid: self.valid_structures.update({struct: recipe})
+        self.hud_version += 1
         print()
 
     def draw(self, surface, scroll, surf_size):
@@ -703,6 +735,16 @@ class Person(Entity):
                 surface.blit(self.item.img, (x -(self.item.held_item_size[0] -self.width) - scroll, \
                     y -(self.height -self.item.held_item_size[1])))
 
+    def get_hud_key(self, pos):
+        ''' Returns what the HUD shows for this Person (see draw_hud), pos - mouse position '''
+        from main import INV_x, CRAFTING_x, STRUCT_INV_x
+        hunger = int((self.max_hunger-self.hunger)/self.max_hunger*100)
+        item = self.item.id if self.item != None else None
+        struct = None
+        if self.struct != None: struct = (id(self.struct), self.struct.hud_version, self.struct.built)
+        slot = hud.get_slot(pos, [INV_x, CRAFTING_x, STRUCT_INV_x]) if self.state == 'player' else None # mouse over
+        return (id(self), self.state, self.health, self.max_health, hunger, item, self.hud_version, struct, slot)
+
     def draw_hud(self, surface):
             from main import TILE_SIZE, INV_FONT_C, INV_FONT, PIXEL_SIZE, \
                 HUD_x, HUD_y, INV_x, ITEM_BORDER, HUD_spacing, ITEM_ID_TO_HUD_IMG, \
@@ -712,20 +754,20 @@ class Person(Entity):
             txt_x = HUD_x +TILE_SIZE +PIXEL_SIZE
             # health
             surface.blit(HEALTH_IMG, (HUD_x, HUD_y)) # health image
-            text = INV_FONT.render(str(self.health), True, INV_FONT_C)
+            text = hud.render_text(INV_FONT, str(self.health), INV_FONT_C)
             surface.blit(text, (txt_x +HUD_spacing//2, HUD_y +TILE_SIZE//2 -1.25*INV_FONT.size(str(round(self.health,0)))[1])) # health text
             pygame.draw.line(surface, INV_FONT_C, (txt_x +HUD_spacing//2, HUD_y +TILE_SIZE//2 -PIXEL_SIZE//2), \
                 (txt_x +HUD_spacing//2 +INV_FONT.size(str(self.max_health))[0], HUD_y +TILE_SIZE//2), width=PIXEL_SIZE//2)
-            text = INV_FONT.render(str(self.max_health), True, INV_FONT_C)
+            text = hud.render_text(INV_FONT, str(self.max_health), INV_FONT_C)
             surface.blit(text, (txt_x +HUD_spacing//2, HUD_y +TILE_SIZE//2 +.25*INV_FONT.size(str(self.max_health))[1])) # max health text
             # hunger
             surface.blit(HUNGER_IMG, (HUD_x, HUD_y +TILE_SIZE +HUD_spacing)) # hunger image
             hunger = int((self.max_hunger-self.hunger)/self.max_hunger*100)
-            text = INV_FONT.render(str(hunger), True, INV_FONT_C)
+            text = hud.render_text(INV_FONT, str(hunger), INV_FONT_C)
             surface.blit(text, (txt_x +HUD_spacing//2, HUD_y +1.5*TILE_SIZE +HUD_spacing -1.25*INV_FONT.size(str(hunger))[1])) # hunger text
             pygame.draw.line(surface, INV_FONT_C, (txt_x +HUD_spacing//2, HUD_y +1.5*TILE_SIZE +HUD_spacing -PIXEL_SIZE//2), \
                 (txt_x +HUD_spacing//2 +INV_FONT.size('100')[0], HUD_y +1.5*TILE_SIZE +HUD_spacing), width=PIXEL_SIZE//2)
-            text = INV_FONT.render('100', True, INV_FONT_C)
+            text = hud.render_text(INV_FONT, '100', INV_FONT_C)
             surface.blit(text, (txt_x +HUD_spacing//2, HUD_y +1.5*TILE_SIZE +HUD_spacing +.25*INV_FONT.size('100')[1])) # max hunger text
             # held item
             if self.item != None:
@@ -734,9 +776,9 @@ class Person(Entity):
 
             # INVENTORY HUD (displays when playing as or selecting a Person)
             # inventory text
-            text = INV_FONT.render('Inventory', True, INV_FONT_C)
+            text = hud.render_text(INV_FONT, 'Inventory', INV_FONT_C)
             surface.blit(text, (INV_x, HUD_y)) # inventory text
-            text = INV_FONT.render(f'{self.get_num_items()}/{self.inventory_space}', True, INV_FONT_C)
+            text = hud.render_text(INV_FONT, f'{self.get_num_items()}/{self.inventory_space}', INV_FONT_C)
             surface.blit(text, (INV_x, HUD_y +TILE_SIZE//2)) # inventory capacity text
 
             mouse_x, mouse_y = pygame.mouse.get_pos()
@@ -747,7 +789,7 @@ class Person(Entity):
                     HUD_y +TILE_SIZE*(i+1) +HUD_spacing*i +PIXEL_SIZE)) # item image
                 surface.blit(INV_BORDER_IMG, (INV_x, \
                     HUD_y +TILE_SIZE*(i+1) +HUD_spacing*i)) # border
-                text = INV_FONT.render(f'x{self.inventory[item_id]}', True, INV_FONT_C)
+                text = hud.render_text(INV_FONT, f'x{self.inventory[item_id]}', INV_FONT_C)
                 surface.blit(text, (INV_x +TILE_SIZE +ITEM_BORDER, \
                     HUD_y +TILE_SIZE*(i+1.5) +HUD_spacing*i)) # number of items text
                 
@@ -761,7 +803,7 @@ class Person(Entity):
                 # CRAFTING HUD
                 if self.recipes:
                     from main import CRAFTING_x
-                    text = INV_FONT.render('Crafting', True, INV_FONT_C)
+                    text = hud.render_text(INV_FONT, 'Crafting', INV_FONT_C)
                     surface.blit(text, (CRAFTING_x, HUD_y)) # crafting text
 
                     for i,item_id in enumerate(self.recipes.keys()):
@@ -783,7 +825,7 @@ class Person(Entity):
                 # BUILD STRUCTURE HUD
                 if self.item != None and 'build' in self.item.tags and self.valid_structures:
                     from main import STRUCT_INV_x
-                    text = INV_FONT.render('Build', True, INV_FONT_C)
+                    text = hud.render_text(INV_FONT, 'Build', INV_FONT_C)
                     surface.blit(text, (STRUCT_INV_x, HUD_y)) # Build text
 
                     for i,struct in enumerate(self.valid_structures.keys()):
@@ -802,14 +844,10 @@ class Person(Entity):
     def update_frame(self):
         # update animations for held items too (relevant lines commented)
         if self.item != None:
-            from main import SPRITESHEET_SPACING
             if not self.animated or math.ceil(self.frame_num) >= self.frames:
                 self.frame_num = 0
-            self.img = self.sprite_sheet.subsurface((math.ceil(self.frame_num)*(self.width+SPRITESHEET_SPACING),0,self.width,self.height))
-            self.item.img = self.item.sprite_sheet.subsurface((math.ceil(self.frame_num)*(self.item.held_item_size[0]+SPRITESHEET_SPACING),0,self.item.held_item_size[0],self.item.held_item_size[1])) # for held item
-            if self.facing == 'left':
-                self.img = pygame.transform.flip(self.img,1,0)
-                self.item.img = pygame.transform.flip(self.item.img,1,0) # for held item
+            self.img = get_frame(self.sprite_sheet, (self.width, self.height), math.ceil(self.frame_num), self.facing)
+            self.item.img = get_frame(self.item.sprite_sheet, self.item.held_item_size, math.ceil(self.frame_num), self.facing) # for held item
             self.frame_num += self.animation_time_scale
         else:
             super().update_frame() # if no held item, update animation frames normally
@@ -818,17 +856,18 @@ class Person(Entity):
 class Structure(Entity):
     ''' Sructures can store items (have inventory) and can be built
     possible tags: light '''
-    def __init__(self,x,y,x_size,y_size, sprite_sheet, health=DEF_HEALTH, loot=[], tags=[], \
+    def __init__(self,x,y,x_size,y_size, sprite_sheet, name='', health=DEF_HEALTH, loot=[], tags=[], \
         animated=False, facing='right', frames=DEF_FRAMES,animation_time_scale=DEF_ANIMATION_TIME_SCALE, \
         inventory_space=0, inventory={}, built=1, build_time=DEF_BUILD_TIME):
-        super().__init__(x,y,x_size,y_size, sprite_sheet, health=health, loot=loot, tags=tags, \
+        super().__init__(x,y,x_size,y_size, sprite_sheet, name=name, health=health, loot=loot, tags=tags, \
             animated=animated, facing=facing, frames=frames,animation_time_scale=animation_time_scale)
         self.inventory = inventory # maps item ids to number of items
         self.inventory_space = inventory_space
+        self.hud_version = 0 # changes with inventory (see Person.get_hud_key)
         self.built = built # percent of structure that's built
         if self.built != 1:
-            from main import SCAFFOLDING_IMG
-            self.scaffolding = pygame.transform.scale(SCAFFOLDING_IMG, (self.width, self.height))
+            from main import images
+            self.scaffolding = images.get('img/structure/scaffolding.png', size=(self.width, self.height))
         self.build_time = build_time # in frames 
 
     def get_num_items(self):
@@ -845,9 +884,18 @@ class Structure(Entity):
             if new_quantity > 0: self.inventory[item_id] = new_quantity
             elif new_quantity == 0: del self.inventory[item_id]
             else: return
+        self.hud_version += 1
+        self.mark_dirty()
     
     def build(self, strength=1):
-        if self.built < 1: self.built = min(1, self.built +strength/self.build_time)
+        if self.built < 1: 
+            self.built = min(1, self.built +strength/self.build_time)
+            self.mark_dirty()
+
+    def mark_dirty(self):
+        ''' Structure's chunk needs saving (see save.py) '''
+        from main import chunk_data, CHUNK_SIZE
+        chunk_data.mark_dirty(int((self.x +self.width//2)//CHUNK_SIZE))
 
     def draw(self, surface, scroll, surf_size):
         x, y = utility.zoom_transform(surf_size, (self.x, self.y))
@@ -859,9 +907,9 @@ class Structure(Entity):
             from main import INV_FONT, INV_FONT_C, HUD_y, STRUCT_INV_x, TILE_SIZE, ITEM_BORDER, PIXEL_SIZE, \
                 HUD_spacing, ITEM_ID_TO_HUD_IMG, INV_BORDER_IMG, INV_BORDER_SELECTED_IMG
             
-            text = INV_FONT.render('Inventory', True, INV_FONT_C)
+            text = hud.render_text(INV_FONT, 'Inventory', INV_FONT_C)
             surface.blit(text, (STRUCT_INV_x, HUD_y)) # struct inventory text
-            text = INV_FONT.render(f'{self.get_num_items()}/{self.inventory_space}', True, INV_FONT_C)
+            text = hud.render_text(INV_FONT, f'{self.get_num_items()}/{self.inventory_space}', INV_FONT_C)
             surface.blit(text, (STRUCT_INV_x, HUD_y +TILE_SIZE//2)) # struct inventory capacity text
 
             mouse_x, mouse_y = pygame.mouse.get_pos()
@@ -871,7 +919,7 @@ class Structure(Entity):
                 surface.blit(INV_BORDER_IMG, (STRUCT_INV_x, \
                     HUD_y +TILE_SIZE*(i+1) +HUD_spacing*i)) # border
                 
-                text = INV_FONT.render(f'x{self.inventory[item_id]}', True, INV_FONT_C)
+                text = hud.render_text(INV_FONT, f'x{self.inventory[item_id]}', INV_FONT_C)
                 surface.blit(text, (STRUCT_INV_x +TILE_SIZE +ITEM_BORDER, \
                     HUD_y +TILE_SIZE*(i+1.5) +HUD_spacing*i)) # number of items text
 
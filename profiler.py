@@ -0,0 +1,189 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import pygame
+import csv
+import io
+import cProfile
+import pstats
+from time import perf_counter
+from collections import deque
+
+HISTORY = 600 # number of frames of timings to keep
+COUNTERS = ['blits', 'live_objects', 'surfaces', 'drawn', 'culled', 'bakes'] # per-frame counts written to traces
+TRACE_FLUSH = 60 # in frames, how often trace files are flushed to disk
+CAPTURE_TOP = 40 # number of functions listed in cProfile capture summaries
+# overlay graph
+GRAPH_WIDTH = 240 # in pixels (1 pixel per frame)
+GRAPH_HEIGHT = 120 # in pixels
+GRAPH_MS = 1000/30 # frame time at the top of the graph, in ms
+GRAPH_BUDGET_MS = 1000/60 # frame time budget line, in ms
+LEGEND_UPDATE = 30 # in frames, how often the legend text is re-rendered
+PHASE_COLORS = [(230,25,75), (60,180,75), (255,225,25), (0,130,200), (245,130,48), 
+    (145,30,180), (70,240,240), (240,50,230), (210,245,60), (250,190,212), (0,128,128)]
+
+class Profiler(object):
+    ''' Times phases of each frame (e.g., ground, lighting) and counts per-frame events (e.g., surfaces allocated).
+    usage:
+        with profiler.phase('ground'): draw_ground(surf,surf_size)
+        profiler.count('blits', 3)
+        profiler.end_frame() # once per frame, saves the frame's timings to self.frames '''
+    def __init__(self, history=HISTORY):
+        self.frame = {} # maps phase/counter name to time (in ms) or count for the current frame
+        self.frames = deque(maxlen=history) # dicts for previous frames (oldest first)
+        self.frame_start = perf_counter()
+        self.timers = {} # maps phase name to _Phase (reused every frame)
+        self.frame_num = 0 # number of frames ended
+        self.trace = None # csv writer for per-frame traces (see start_trace)
+        self.trace_file = None
+        self.graph = None # Surface for the overlay's rolling graph
+        self.legend = [] # rendered legend text for the overlay
+        self.capture_profile = None # cProfile.Profile recording frames (see capture)
+        self.capture_frames = 0 # frames left to record
+
+    def phase(self, name):
+        ''' Returns a context manager that adds the time spent inside it to phase name (in ms) '''
+        if name not in self.timers: self.timers[name] = _Phase(self, name)
+        return self.timers[name]
+
+    def count(self, name, n=1):
+        self.frame[name] = self.frame.get(name, 0) +n
+
+    def set(self, name, n):
+        self.frame[name] = n
+
+    def end_frame(self):
+        ''' save the current frame's timings and start a new frame '''
+        now = perf_counter()
+        self.frame['frame'] = (now -self.frame_start)*1000
+        self.frames.append(self.frame)
+        if self.graph != None: self.update_graph()
+        if self.trace != None: self.write_trace()
+        if self.capture_profile != None:
+            self.capture_frames -= 1
+            if self.capture_frames <= 0: self.end_capture()
+        self.frame = {}
+        self.frame_start = now
+        self.frame_num += 1
+
+    def start_trace(self, path):
+        ''' stream every frame's timings and counts to a csv file at path (until stop_trace) '''
+        self.stop_trace()
+        self.trace_file = open(path, 'w', newline='')
+        self.trace = csv.writer(self.trace_file)
+        self.trace_columns = None # written with the first traced frame (once the frame's phases are known)
+        self.trace_start = perf_counter()
+
+    def stop_trace(self):
+        if self.trace_file != None: self.trace_file.close()
+        self.trace = None
+        self.trace_file = None
+
+    def write_trace(self):
+        if self.trace_columns == None:
+            self.trace_columns = ['frame'] +list(self.timers.keys()) +COUNTERS
+            self.trace.writerow(['frame_num', 'time'] +self.trace_columns)
+        self.trace.writerow([self.frame_num, round(perf_counter() -self.trace_start, 4)] + \
+            [round(self.frame.get(c, 0), 4) for c in self.trace_columns])
+        if self.frame_num%TRACE_FLUSH == 0: self.trace_file.flush()
+
+    def reset(self):
+        self.frame = {}
+        self.frames.clear()
+        self.frame_start = perf_counter()
+
+    def capture(self, frames, path):
+        ''' record the next frames under cProfile, then save them to path.pstats and
+        a summary of the top functions (by cumulative and internal time) to path.txt '''
+        if self.capture_profile != None: return
+        self.capture_path = path
+        self.capture_frames = frames
+        self.capture_total = frames
+        self.capture_start = perf_counter()
+        self.capture_profile = cProfile.Profile()
+        self.capture_profile.enable()
+
+    def end_capture(self):
+        ''' stop recording frames and save the capture. Returns path of the summary '''
+        self.capture_profile.disable()
+        self.capture_profile.dump_stats(self.capture_path+'.pstats')
+        elapsed = perf_counter() -self.capture_start
+        with open(self.capture_path+'.txt', 'w') as file:
+            file.write(f'{self.capture_total -self.capture_frames} frames in {elapsed:.2f}s\n')
+            for sort in ('cumulative', 'tottime'):
+                out = io.StringIO()
+                pstats.Stats(self.capture_profile, stream=out).sort_stats(sort).print_stats(CAPTURE_TOP)
+                file.write(f'\nTOP {CAPTURE_TOP} BY {sort.upper()} TIME\n' +out.getvalue())
+        self.capture_profile = None
+        print(f'saved profile to {self.capture_path}.pstats and {self.capture_path}.txt')
+        return self.capture_path+'.txt'
+
+    def draw_overlay(self, surface, font, pos, color=(0,0,0)):
+        ''' draw a rolling graph of phase times (stacked, 1 pixel column per frame) with a legend
+        of average times and counts (over the last LEGEND_UPDATE frames) '''
+        if self.graph == None:
+            self.graph = pygame.Surface((GRAPH_WIDTH, GRAPH_HEIGHT), pygame.SRCALPHA)
+            self.graph.fill((0,0,0,128))
+            return
+        x, y = pos
+        surface.blit(self.graph, pos)
+        budget_y = y +GRAPH_HEIGHT -int(GRAPH_BUDGET_MS/GRAPH_MS*GRAPH_HEIGHT)
+        pygame.draw.line(surface, (255,255,255), (x, budget_y), (x +GRAPH_WIDTH, budget_y))
+
+        if self.frame_num%LEGEND_UPDATE == 0 or not self.legend:
+            frames = list(self.frames)[-LEGEND_UPDATE:]
+            self.legend = []
+            for i,name in enumerate(list(self.timers.keys()) +['frame'] +COUNTERS):
+                avg = sum(f.get(name, 0) for f in frames)/max(len(frames), 1)
+                if name in COUNTERS: text = f'{name}: {avg:.0f}'
+                else: text = f'{name}: {avg:.2f} ms'
+                c = PHASE_COLORS[i%len(PHASE_COLORS)] if name in self.timers else color
+                self.legend.append(font.render(text, True, c))
+        for i,text in enumerate(self.legend):
+            surface.blit(text, (x, y +GRAPH_HEIGHT +4 +i*font.get_linesize()))
+
+    def update_graph(self):
+        ''' scroll the overlay graph left and draw the newest frame as a column of stacked phase times '''
+        self.graph.scroll(-1, 0)
+        self.graph.fill((0,0,0,128), (GRAPH_WIDTH-1, 0, 1, GRAPH_HEIGHT))
+        y = GRAPH_HEIGHT
+        for i,name in enumerate(self.timers.keys()):
+            h = self.frame.get(name, 0)/GRAPH_MS*GRAPH_HEIGHT
+            if y -h < 0: h = y
+            self.graph.fill(PHASE_COLORS[i%len(PHASE_COLORS)], (GRAPH_WIDTH-1, round(y -h), 1, round(y) -round(y -h)))
+            y -= h
+
+    def track_surfaces(self):
+        ''' count Surfaces allocated by pygame.Surface, transform.scale, transform.smoothscale and transform.flip
+        (as 'surfaces' in each frame). Affects all modules, call once '''
+        profiler = self
+        class Surface(pygame.Surface):
+            def __init__(self, *args, **kwargs):
+                profiler.count('surfaces')
+                super().__init__(*args, **kwargs)
+        pygame.Surface = Surface
+        for name in ('scale', 'smoothscale'):
+            setattr(pygame.transform, name, self._counted(getattr(pygame.transform, name), dest=True))
+        pygame.transform.flip = self._counted(pygame.transform.flip)
+
+    def _counted(self, fn, dest=False):
+        ''' wrap a pygame.transform fn to count the Surfaces it allocates 
+        dest - bool, fn takes an optional destination Surface as its 3rd arg (nothing is allocated when it's given) '''
+        def counted(*args, **kwargs):
+            if not dest or (len(args) < 3 and 'dest_surface' not in kwargs): self.count('surfaces')
+            return fn(*args, **kwargs)
+        return counted
+
+
+class _Phase(object):
+    ''' context manager for timing one phase of a frame (see Profiler.phase) '''
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        frame = self.profiler.frame
+        frame[self.name] = frame.get(self.name, 0) +(perf_counter() -self.start)*1000
@@ -0,0 +1,196 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import pygame
+import weakref
+import math
+from collections import Counter
+
+MAX_DIRTY_RECTS = 16 # more dirty regions than this are merged into one (see merge_rects)
+MAX_DIRTY_AREA = .5 # fraction of the target, frames with more dirty area are redrawn whole
+
+class RenderTarget(object):
+    ''' Persistent surface the world is drawn onto before it's scaled to the screen (replaces a new Surface each frame).
+    Drawn on like a Surface (blit, fill) with positions and sizes in full resolution pixels.
+    pixel_size - full resolution pixels per target pixel (see set_pixel_size), images are drawn from copies
+        scaled by 1/pixel_size (nearest neighbor, cached for each pixel_size):
+        PIXEL_SIZE - the world is drawn at the art's native resolution (a "pixel" of art is one pixel of the target)
+            and positions snap to art pixels. Filling and blitting cost 1/pixel_size**2 as much, but details finer
+            than a "pixel" (e.g., grass blades, tile cracks) are lost.
+        1/zoom (for a zoom level) - the target is screen sized, so the frame doesn't need scaling.
+    The target is scaled to the screen once a frame (see present).
+    tracking - bool, dirty rectangle mode: each frame's drawing (begin_frame to end_frame) is recorded and compared
+        with the last frame's, and only regions where it differs (e.g., a Person moved, a campfire animated) are
+        redrawn and presented. The whole frame is redrawn when the view (e.g., scroll and zoom) changes.
+        Images drawn must not be drawn on while they're in use (pass a new version to blit if they are). '''
+    def __init__(self, pixel_size=1, tracking=False):
+        self.pixel_size = None
+        self.size = None # in full resolution pixels (see resize)
+        self.surface = None # pygame.Surface, size/pixel_size
+        self.levels = {} # maps pixel_size to WeakKeyDictionary of scaled images for it (kept when pixel_size changes)
+        self.images = None # maps full resolution Surface to the Surface drawn (scaled by 1/pixel_size)
+        self.tracking = tracking
+        self.ops = [] # this frame's drawing, list of (op, Rect of surface drawn on) (see draw)
+        self.last = None # Counter of the last frame's ops (with the op before each), None to redraw the whole frame
+        self.last_rects = {} # maps the last frame's ops to Rect drawn on
+        self.view = None # the last frame's view (see begin_frame)
+        self.full = True # drawing the whole frame
+        self.set_pixel_size(pixel_size)
+
+    def set_pixel_size(self, pixel_size):
+        ''' pixel_size - full resolution pixels per target pixel (int or float, e.g. 0.5 draws images at twice their size) '''
+        if pixel_size == self.pixel_size: return
+        self.pixel_size = pixel_size
+        self.images = self.levels.setdefault(pixel_size, weakref.WeakKeyDictionary())
+        self.size = None # reallocate (see resize)
+
+    def resize(self, size):
+        ''' reallocate the target if it's not size (full resolution pixels, e.g., the zoomed screen size) '''
+        size = (int(size[0]), int(size[1]))
+        if size == self.size: return
+        self.size = size
+        self.surface = pygame.Surface((math.ceil(size[0]/self.pixel_size), math.ceil(size[1]/self.pixel_size))).convert()
+        self.last = None
+
+    def get_size(self):
+        return self.size
+
+    def to_target(self, pos):
+        ''' Returns position on the target's surface of pos (in full resolution pixels) '''
+        if self.pixel_size == 1: return pos
+        return int(pos[0]//self.pixel_size), int(pos[1]//self.pixel_size)
+
+    def get_image(self, img):
+        ''' Returns img (pygame.Surface) scaled by 1/pixel_size (cached for as long as img exists) '''
+        if self.pixel_size == 1: return img
+        try: return self.images[img]
+        except KeyError:
+            w, h = img.get_size()
+            scaled = pygame.transform.scale(img, (max(1, round(w/self.pixel_size)), max(1, round(h/self.pixel_size))))
+            if img.get_flags() & pygame.RLEACCEL: scaled.set_alpha(img.get_alpha(), pygame.RLEACCEL)
+            self.images[img] = scaled
+            return scaled
+
+    def begin_frame(self, view, full=False):
+        ''' start drawing a frame (after resize)
+        view - what the frame is viewed from (e.g., (scroll, zoom)), the whole frame is redrawn when it changes
+        full - bool, redraw the whole frame (e.g., debug info is drawn over it) '''
+        self.ops = []
+        self.full = not self.tracking or full or self.last == None or view != self.view
+        self.view = view
+
+    def draw(self, op, rect):
+        ''' draw op (see replay) now, or record it to draw in end_frame if the frame is only redrawn where it changed
+        rect - pygame.Rect of the surface op draws on '''
+        if self.tracking: self.ops.append((op, rect))
+        if self.full: self.replay(op)
+        return rect
+
+    def replay(self, op):
+        ''' op - ('blit', img, pos, area, special_flags, version), ('fill', color, rect), or ('line', color, start, end, width)
+        in the surface's pixels '''
+        if op[0] == 'blit': self.surface.blit(op[1], op[2], op[3], op[4])
+        elif op[0] == 'fill': self.surface.fill(op[1], op[2])
+        else: pygame.draw.line(self.surface, op[1], op[2], op[3], op[4])
+
+    def blit(self, img, pos, area=None, special_flags=0, scaled=False, version=None):
+        ''' img - pygame.Surface (full resolution) or RenderTarget with the same pixel_size
+        pos - (x, y) or pygame.Rect, in full resolution pixels
+        scaled - bool, img is already scaled by 1/pixel_size
+        version - changes when img is drawn on (redraws it with tracking) '''
+        if type(img) == RenderTarget: img = img.surface
+        elif not scaled: img = self.get_image(img)
+        if isinstance(pos, pygame.Rect): pos = pos.topleft
+        pos = self.to_target(pos)
+        pos = (int(pos[0]), int(pos[1])) # as blit would, so moving less than a pixel isn't a change
+        if area != None:
+            area = pygame.Rect([int(v//self.pixel_size) for v in pygame.Rect(area)])
+            rect = pygame.Rect(pos, area.size)
+            area = tuple(area)
+        else: rect = pygame.Rect(pos, img.get_size())
+        return self.draw(('blit', img, pos, area, special_flags, version), rect)
+
+    def fill(self, color, rect=None):
+        if rect == None: return self.draw(('fill', tuple(color), None), self.surface.get_rect())
+        rect = pygame.Rect(rect)
+        x, y = self.to_target(rect.topleft)
+        right, bottom = math.ceil(rect.right/self.pixel_size), math.ceil(rect.bottom/self.pixel_size)
+        rect = pygame.Rect(x, y, right -x, bottom -y)
+        return self.draw(('fill', tuple(color), tuple(rect)), rect)
+
+    def draw_line(self, color, start, end, width=1):
+        start, end, width = self.to_target(start), self.to_target(end), max(1, int(width//self.pixel_size))
+        rect = pygame.Rect(min(start[0], end[0]), min(start[1], end[1]), abs(end[0]-start[0]), abs(end[1]-start[1])).inflate(width*2, width*2)
+        self.draw(('line', tuple(color), tuple(start), tuple(end), width), rect)
+
+    def end_frame(self):
+        ''' finish drawing a frame. With tracking, redraw regions which changed since the last frame
+        (those drawn on by ops which were added, removed, moved or reordered).
+        Returns list of regions (pygame.Rects of the target's surface) redrawn, None if the whole frame was '''
+        if not self.tracking: return None
+        ops, rects, prev = Counter(), {}, None
+        for op, rect in self.ops:
+            key = (op, prev) # what was drawn before catches ops drawn in a new order
+            ops[key] += 1
+            rects[key] = rect
+            prev = op[:2] # not where, so moving an op doesn't change the next
+        last, last_rects = self.last, self.last_rects
+        self.last, self.last_rects = ops, rects
+        if self.full: return None
+
+        dirty = [rects[key] for key in ops if ops[key] != last[key]] +[last_rects[key] for key in last if ops[key] != last[key]]
+        bounds = self.surface.get_rect()
+        dirty = merge_rects([r.inflate(2, 2) for r in dirty], bounds) # pixel of margin for positions drawn between pixels
+        if sum(r.w*r.h for r in dirty) > MAX_DIRTY_AREA*bounds.w*bounds.h:
+            for op, rect in self.ops: self.replay(op)
+            return None
+        op_rects = [rect for op, rect in self.ops]
+        for r in dirty:
+            self.surface.set_clip(r)
+            for i in r.collidelistall(op_rects): self.replay(self.ops[i][0])
+        self.surface.set_clip(None)
+        return dirty
+
+    def present(self, dest, rects=None, dest_rects=[]):
+        ''' scale the target onto dest (pygame.Surface, e.g., the screen) without allocating a Surface
+        rects - list of regions of the target to present (see end_frame), None for all of it
+        dest_rects - list of regions of dest to present too (e.g., where something drawn over the target was)
+        Returns list of regions of dest presented (pygame.Rects), None if all of it was '''
+        w, h = self.surface.get_size()
+        dw, dh = dest.get_size()
+        if (w, h) == (dw, dh): up = down = 1
+        else: up, down = dw//w, w//dw # integer scale factors (nearest neighbor scaling is exact for them)
+        if rects == None or not ((up > 0 and (w*up, h*up) == (dw, dh)) or (down > 0 and (dw*down, dh*down) == (w, h))):
+            if (w, h) == (dw, dh): dest.blit(self.surface, (0,0))
+            else: pygame.transform.scale(self.surface, dest.get_size(), dest)
+            return None
+        if up > 0:
+            rects = rects +[pygame.Rect(r.x//up, r.y//up, math.ceil(r.right/up) -r.x//up, math.ceil(r.bottom/up) -r.y//up) for r in dest_rects]
+            to_dest = lambda r: pygame.Rect(r.x*up, r.y*up, r.w*up, r.h*up)
+        else: # whole dest pixels
+            rects = [pygame.Rect(r.x//down*down, r.y//down*down, math.ceil(r.right/down)*down -r.x//down*down,
+                math.ceil(r.bottom/down)*down -r.y//down*down) for r in rects] +[pygame.Rect(r.x*down, r.y*down, r.w*down, r.h*down) for r in dest_rects]
+            to_dest = lambda r: pygame.Rect(r.x//down, r.y//down, r.w//down, r.h//down)
+        presented = []
+        for r in merge_rects(rects, self.surface.get_rect()):
+            d = to_dest(r)
+            if up == 1 and down == 1: dest.blit(self.surface, d, r)
+            else: pygame.transform.scale(self.surface.subsurface(r), d.size, dest.subsurface(d))
+            presented.append(d)
+        return presented
+
+
+def merge_rects(rects, bounds):
+    ''' Returns list of rects (pygame.Rects) clipped to bounds, with overlapping rects merged (so none overlap),
+    merged into one if there are more than MAX_DIRTY_RECTS '''
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect.w or not rect.h: continue
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    if len(merged) > MAX_DIRTY_RECTS: merged = [merged[0].unionall(merged[1:])]
+    return merged
@@ -0,0 +1,250 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+''' Saving and loading worlds.
+A save is a directory holding:
+    world.txt - json meta data (world seed and size, chunks.Registry names, scroll, ticks, zoom)
+    r<region>.bin - region files, each holding the chunks of REGION_SIZE consecutive chunk numbers
+Region file layout (little endian):
+    header - MAGIC, VERSION, REGION_SIZE
+    offset table - (offset, length) of each chunk's record in the file, (0, 0) for chunks that aren't saved
+    records - biome id, tile ids for each layer in chunks.TILE_LAYERS (TILES_PER_CHUNK bytes each),
+        length of entity json, entity json ({'animals': [...], ...} only for non-empty lists)
+Region files are read through mmap, so loading a world only reads the meta data and chunks are read
+(from the regions near the camera) the first time they're accessed. Chunks that aren't saved are generated.
+Only dirty chunks (see chunks.ChunkStore) and chunks with moving objects are saved, on AutoSaver's thread. '''
+
+import os
+import json
+import mmap
+import struct
+import queue
+import threading
+import numpy
+import chunks
+import generate
+import utility
+
+META_FILE = 'world' # utility.save_json adds .txt
+REGION_SIZE = 64 # chunks per region file
+MAGIC = b'KRGN'
+VERSION = 1
+HEADER = struct.Struct('<4sHH') # magic, version, region size
+ENTRY = struct.Struct('<II') # offset and length of a chunk's record
+RECORD = struct.Struct('<BI') # biome id, length of entity json
+TILE_BYTES = chunks.TILES_PER_CHUNK*numpy.dtype(chunks.ChunkStore.DTYPE).itemsize # for each tile layer
+
+def exists(path):
+    ''' Returns True if there is a saved world at path '''
+    return os.path.exists(os.path.join(path, META_FILE+'.txt'))
+
+def get_region(chunk_num):
+    return chunk_num//REGION_SIZE
+
+def get_region_path(path, region):
+    return os.path.join(path, f'r{region}.bin')
+
+def encode_chunk(chunk, registry):
+    ''' Returns bytes for a chunk's record (chunk is a dict of chunk data) '''
+    tiles = b''.join(numpy.array([registry.get_id(name) for name in chunk[layer]], chunks.ChunkStore.DTYPE).tobytes() \
+        for layer in chunks.TILE_LAYERS)
+    entities = {key: chunk[key] for key in chunks.ENTITY_LISTS if chunk[key]}
+    entities = json.dumps(entities).encode() if entities else b''
+    return RECORD.pack(registry.get_id(chunk['biome']), len(entities)) +tiles +entities
+
+def decode_chunk(record, registry):
+    ''' Returns chunk data (dict) from a chunk's record '''
+    biome, length = RECORD.unpack_from(record)
+    chunk = {'biome': registry.names[biome]}
+    for i,layer in enumerate(chunks.TILE_LAYERS):
+        start = RECORD.size +i*TILE_BYTES
+        ids = numpy.frombuffer(record[start:start +TILE_BYTES], chunks.ChunkStore.DTYPE)
+        chunk[layer] = [registry.names[id] for id in ids.tolist()]
+    entities = {}
+    if length: entities = json.loads(bytes(record[RECORD.size +len(chunks.TILE_LAYERS)*TILE_BYTES:]))
+    for key in chunks.ENTITY_LISTS: chunk[key] = [tuple(t) for t in entities.get(key, [])]
+    return chunk
+
+
+class RegionFile(object):
+    ''' read-only access to a region file's chunk records through mmap '''
+    def __init__(self, filename):
+        self.file = open(filename, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC or version != VERSION: raise ValueError(f'{filename} is not a region file (version {VERSION})')
+        self.size = size
+
+    def read(self, i):
+        ''' Returns record (bytes) for the chunk at index i in the region, None if it isn't saved '''
+        offset, length = ENTRY.unpack_from(self.mmap, HEADER.size +i*ENTRY.size)
+        if not length: return None
+        return self.mmap[offset:offset +length]
+
+    def read_all(self):
+        ''' Returns dict mapping index in the region to record (for every saved chunk) '''
+        records = {}
+        for i in range(self.size):
+            record = self.read(i)
+            if record != None: records[i] = record
+        return records
+
+    def close(self):
+        self.mmap.close()
+        self.file.close()
+
+
+class RegionLoader(object):
+    ''' loads chunks from a save's region files (opened the first time one of their chunks is accessed),
+    generating chunks that aren't saved. Used as the generate function of a chunks.ChunkStore '''
+    def __init__(self, path, registry):
+        self.path = path
+        self.registry = registry
+        self.regions = {} # maps region number to RegionFile (None if the region isn't saved)
+        self.lock = threading.Lock() # region files are replaced on AutoSaver's thread
+
+    def __call__(self, chunk_num):
+        with self.lock:
+            region = self.get_region_file(get_region(chunk_num))
+            record = region.read(chunk_num%REGION_SIZE) if region != None else None
+        if record != None: return decode_chunk(record, self.registry)
+        return generate.generate_lazy_chunk(chunk_num)
+
+    def get_region_file(self, region):
+        if region not in self.regions:
+            filename = get_region_path(self.path, region)
+            self.regions[region] = RegionFile(filename) if os.path.exists(filename) else None
+        return self.regions[region]
+
+    def close(self, region=None):
+        ''' close one region's file (all if region is None), it's reopened the next time it's accessed '''
+        for r in ([region] if region != None else list(self.regions.keys())):
+            if self.regions.get(r) != None: self.regions[r].close()
+            self.regions.pop(r, None)
+
+
+def write_region(path, region, records, loader=None):
+    ''' write records (dict mapping chunk number to record bytes) to a region file, keeping chunks
+    already saved in the file. The file is replaced atomically (written to a temporary file first)
+    loader - RegionLoader reading the file (closed so the file can be replaced) '''
+    filename = get_region_path(path, region)
+    saved = {}
+    if os.path.exists(filename):
+        old = RegionFile(filename)
+        saved = old.read_all()
+        old.close()
+    saved.update({c%REGION_SIZE: record for c,record in records.items()})
+
+    offset = HEADER.size +REGION_SIZE*ENTRY.size
+    table, data = [], []
+    for i in range(REGION_SIZE):
+        record = saved.get(i, b'')
+        table.append(ENTRY.pack(offset if record else 0, len(record)))
+        data.append(record)
+        offset += len(record)
+    with open(filename+'.tmp', 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, REGION_SIZE))
+        file.write(b''.join(table))
+        file.write(b''.join(data))
+        file.flush()
+        os.fsync(file.fileno())
+    if loader == None: os.replace(filename+'.tmp', filename)
+    else:
+        with loader.lock:
+            loader.close(region)
+            os.replace(filename+'.tmp', filename)
+
+def clear(path):
+    ''' delete the saved world at path '''
+    if not os.path.exists(path): return
+    for filename in os.listdir(path):
+        if filename.endswith('.bin') or filename == META_FILE+'.txt': os.remove(os.path.join(path, filename))
+
+def prepare_save(path, chunk_data, state, snapshot):
+    ''' copy what needs saving (on the game thread, so it's consistent). chunk_data's dirty chunks are saved
+    (and no longer dirty), chunks in snapshot are saved from snapshot instead of chunk_data.
+    The first time a world is saved to path, chunk_data is loaded from path from then on (so chunks saved to path
+    are kept when they're loaded again). A different world saved at path is never replaced (raises FileExistsError,
+    clear it first).
+    Returns save (pass to write_save) '''
+    loader = chunk_data.generate
+    if type(loader) != RegionLoader or loader.path != path:
+        if exists(path): raise FileExistsError(f'a different world is saved at {path}')
+        clear(path) # region files without meta data (e.g., an unfinished first save)
+        loader = chunk_data.generate = RegionLoader(path, chunk_data.registry)
+    data = {}
+    for chunk in chunk_data.dirty | set(snapshot.keys()):
+        data[chunk] = snapshot[chunk] if chunk in snapshot else chunk_data.to_dict(chunk)
+    chunk_data.dirty.clear()
+    meta = dict(state)
+    meta.update({'seed': generate.world_seed, 'world_size': generate.WORLD_SIZE, 'region_size': REGION_SIZE})
+    return {'path': path, 'chunks': data, 'meta': meta, 'registry': chunk_data.registry, 'loader': loader}
+
+def write_save(save):
+    ''' encode and write a save from prepare_save (safe to call on another thread).
+    Each region file is replaced atomically, then the meta data '''
+    path, registry = save['path'], save['registry']
+    os.makedirs(path, exist_ok=True)
+    regions = {} # maps region number to {chunk number: record}
+    for chunk, data in save['chunks'].items():
+        regions.setdefault(get_region(chunk), {})[chunk] = encode_chunk(data, registry)
+    for region, records in regions.items(): write_region(path, region, records, save['loader'])
+    meta = dict(save['meta'], registry=list(registry.names))
+    utility.save_json(os.path.join(path, META_FILE), meta)
+
+def save_world(path, chunk_data, state, snapshot={}):
+    ''' save a world to the directory at path (see prepare_save)
+    chunk_data - chunks.ChunkStore
+    state - dict of game state saved in the meta data (e.g., scroll, ticks)
+    snapshot - dict {chunk_number : {<chunk data>}} to save instead of chunk_data for some chunks
+        (chunks with live objects, see streaming.ChunkStreamer.snapshot) '''
+    write_save(prepare_save(path, chunk_data, state, snapshot))
+
+
+class AutoSaver(object):
+    ''' saves worlds on a background thread, so the game doesn't freeze while chunks are encoded and written.
+    usage (on the game thread):
+        autosaver.save(path, chunk_data, state, streamer) # every interval seconds '''
+    def __init__(self, interval):
+        self.interval = interval # in seconds (real time), see update
+        self.last_save = None # time of the last save, in seconds (the now passed to update)
+        self.object_chunks = set() # chunks with moving objects at the last save (they may have left)
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='autosave', daemon=True)
+        self.thread.start()
+
+    def update(self, now, path, chunk_data, state, streamer):
+        ''' save if it's been interval seconds since the last save (and the last save is done) '''
+        if self.last_save == None: self.last_save = now
+        if now -self.last_save < self.interval or self.queue.unfinished_tasks: return
+        self.last_save = now
+        self.save(path, chunk_data, state, streamer)
+
+    def save(self, path, chunk_data, state, streamer, wait=False):
+        ''' save dirty chunks and chunks with moving objects (Animals and Persons, their state changes every tick)
+        streamer - streaming.ChunkStreamer with the live objects
+        wait - bool, wait for the save to be written '''
+        object_chunks = streamer.get_object_chunks()
+        snapshot = streamer.snapshot(chunk_data.dirty | object_chunks | self.object_chunks)
+        self.object_chunks = object_chunks
+        self.queue.put(prepare_save(path, chunk_data, state, snapshot))
+        if wait: self.queue.join()
+
+    def run(self):
+        while 1:
+            save = self.queue.get()
+            try: write_save(save)
+            except Exception as e: print(f'autosave to {save["path"]} failed: {e}')
+            self.queue.task_done()
+
+def load_world(path):
+    ''' load a world from the directory at path (only the meta data is read, see RegionLoader)
+    Returns chunk_data (chunks.ChunkStore) and state (dict passed to save_world) '''
+    meta = utility.load_json(os.path.join(path, META_FILE))
+    if meta['region_size'] != REGION_SIZE: raise ValueError(f'{path} was saved with {meta["region_size"]} chunk regions')
+    generate.set_world_size(meta['world_size'])
+    generate.generate_world(meta['seed']) # continent and ocean sizes
+    registry = chunks.Registry(meta['registry'])
+    loader = RegionLoader(path, registry)
+    chunk_data = chunks.ChunkStore(-generate.WORLD_SIZE//2, generate.WORLD_SIZE//2, generate=loader, registry=registry)
+    return chunk_data, meta
@@ -0,0 +1,11 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+''' Tile and chunk sizes, for modules which need them without starting the game (e.g., baking worlds in generate.py)
+main imports them, so they're also read with "from main import ..." '''
+
+PIXEL_SIZE = 4 # in-game "pixel" size, measured in pixels (chunkiness of art)
+PIXELS_PER_TILE = 8
+TILE_SIZE = PIXELS_PER_TILE*PIXEL_SIZE # in pixels
+TILES_PER_CHUNK = 16 # in tiles
+CHUNK_SIZE = TILES_PER_CHUNK*TILE_SIZE # in pixels
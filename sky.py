@@ -0,0 +1,87 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import math
+import random
+import pygame
+import utility
+from collections import OrderedDict
+
+CLOUDS_PER_CHUNK = 2
+CLOUD_PROB = .4
+CLOUD_TYPES = 3 # number of cloud images (img/envir/cloud0.png, ...)
+MAX_STRIPS = 3 # baked strips kept (two are in view at most)
+
+class CloudLayer(object):
+    ''' Clouds across the whole sky, drawn with paralax (moving PARALAX_FACTOR as fast as the ground) and drift.
+    Clouds are generated for each chunk of sky (from the world seed and chunk number, so they're always the same,
+    repeating every world_size chunks) and baked into strips of strip_chunks chunks, at least as wide as the view.
+    Each cloud (or clouds overlapping) is blitted from its strip on its own, so drifting only changes the sky where
+    clouds are (see render.RenderTarget's tracking). Strips are baked the first time they're drawn (MAX_STRIPS are kept). '''
+    def __init__(self, seed, world_size, strip_chunks):
+        self.seed = seed # world seed
+        self.world_size = world_size # in chunks, the sky repeats after this many
+        self.strip_chunks = strip_chunks # chunks of sky in each strip
+        self.strips = OrderedDict() # maps strip number to (Surface, list of Rects of its clouds), least recently drawn first
+
+    def __len__(self):
+        return len(self.strips)
+
+    def get_clouds(self, chunk):
+        ''' Returns list of (image path, flip, x, y) for clouds of a chunk of sky (x, y is the top left, in pixels) '''
+        from main import ANIMATION_DATABASE, CHUNK_SIZE, TILE_SIZE, SCREEN_HEIGHT
+        rng = random.Random(f'{self.seed}/clouds/{chunk %self.world_size}')
+        w, h = ANIMATION_DATABASE['cloud']
+        clouds = []
+        for i in range(CLOUDS_PER_CHUNK):
+            if rng.random() < CLOUD_PROB:
+                pixel = rng.randint(i*CHUNK_SIZE, (i+1)*CHUNK_SIZE)
+                path = f'img/envir/cloud{rng.randint(0, CLOUD_TYPES-1)}.png'
+                y = rng.randint(TILE_SIZE, SCREEN_HEIGHT//2)
+                clouds.append((path, rng.random() >= .5, chunk*CHUNK_SIZE +pixel -w//2, y))
+        return clouds
+
+    def get_strip(self, n):
+        ''' Returns strip n (Surface, list of pygame.Rects of the strip its clouds cover, none overlapping), baking it the first time '''
+        if n in self.strips:
+            self.strips.move_to_end(n)
+            return self.strips[n]
+        from main import ANIMATION_DATABASE, CHUNK_SIZE, TILE_SIZE, SCREEN_HEIGHT, images, perf
+        perf.count('bakes')
+        w, h = ANIMATION_DATABASE['cloud']
+        left = n*self.strip_chunks*CHUNK_SIZE
+        strip = pygame.Surface((self.strip_chunks*CHUNK_SIZE, SCREEN_HEIGHT//2 -TILE_SIZE +h), pygame.SRCALPHA)
+        # clouds of chunks before and after can reach into the strip
+        first = n*self.strip_chunks -math.ceil(w/CHUNK_SIZE) -CLOUDS_PER_CHUNK
+        rects = []
+        for chunk in range(first, (n+1)*self.strip_chunks +math.ceil(w/CHUNK_SIZE)):
+            for path, flip, x, y in self.get_clouds(chunk):
+                rect = strip.blit(images.get(path, flip=flip), (x -left, y -TILE_SIZE)) # clipped to the strip
+                if not rect.w: continue
+                i = rect.collidelist(rects)
+                while i != -1: # merge overlapping clouds (so no pixel is blitted twice)
+                    rect.union_ip(rects.pop(i))
+                    i = rect.collidelist(rects)
+                rects.append(rect)
+        strip.set_alpha(255, pygame.RLEACCEL) # mostly clear sky, run-length encoding skips it when blitting
+        self.strips[n] = strip, rects
+        while len(self.strips) > MAX_STRIPS: self.strips.popitem(last=False)
+        return strip, rects
+
+    def draw(self, surface, scroll, surf_size, ticks):
+        ''' draw the clouds visible on surface
+        ticks - game time in milliseconds (see World.get_ticks), clouds drift right 1 pixel every FPS milliseconds
+        Returns number of blits '''
+        from main import PARALAX_FACTOR, FPS, CHUNK_SIZE, TILE_SIZE
+        width = self.strip_chunks*CHUNK_SIZE
+        x, y = utility.zoom_transform(surf_size, (0, TILE_SIZE)) # position of the sky's origin on surface
+        x = math.floor(x -scroll*PARALAX_FACTOR +ticks//FPS) # whole pixels, so strips meet
+        blits = 0
+        for n in range(math.floor(-x/width), math.floor((surf_size[0] -1 -x)/width) +1):
+            strip, rects = self.get_strip(n)
+            for rect in rects:
+                left = x +n*width +rect.x
+                if left < surf_size[0] and left +rect.w > 0: # on surface
+                    surface.blit(strip, (left, y +rect.y), rect)
+                    blits += 1
+        return blits
@@ -0,0 +1,139 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+class SpatialIndex(object):
+    ''' Finds objects by position without scanning every object.
+    The world is (mostly) 1D along x, so objects are bucketed by the buckets (bucket_size pixels wide, e.g. chunks)
+    their x extent (x to x +width) overlaps, and queries only look at objects in the buckets they cover.
+    Objects must be added when they're created, removed when they're destroyed,
+    and moved (see move) after their x position changes.
+    Animals aren't bucketed (or moved), they're found in the arrays of animals (a fauna.AnimalSystem) all at once.
+    Queries return objects in the order they were added. '''
+    def __init__(self, bucket_size, animals=None):
+        self.bucket_size = bucket_size # in pixels
+        self.animals = animals # fauna.AnimalSystem the Animals added are in
+        self.buckets = {} # maps bucket number to dict {id(obj): obj}
+        self.spans = {} # maps id(obj) to (first bucket, last bucket) the object is in (every object but Animals)
+        self.order = {} # maps id(obj) to number of objects added before it
+        self.objects = {} # maps id(obj) to obj
+        self.added = 0
+        self.version = 0 # changes when objects are added or removed
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __contains__(self, obj):
+        return id(obj) in self.objects
+
+    def get_span(self, obj):
+        ''' Returns (first bucket, last bucket) that obj's x extent overlaps '''
+        first = int(obj.x//self.bucket_size)
+        return first, max(first, int((obj.x +obj.width -1)//self.bucket_size))
+
+    def add(self, obj):
+        if id(obj) in self.objects: return
+        self.order[id(obj)] = self.added
+        self.objects[id(obj)] = obj
+        self.added += 1
+        self.version += 1
+        from obj import Animal
+        if self.animals == None or type(obj) != Animal: self._insert(obj, self.get_span(obj))
+
+    def remove(self, obj):
+        if id(obj) not in self.objects: return
+        if id(obj) in self.spans: self._delete(obj)
+        del self.order[id(obj)]
+        del self.objects[id(obj)]
+        self.version += 1
+
+    def move(self, obj):
+        ''' update obj's buckets after its x position (or width) changes '''
+        if id(obj) not in self.spans: return
+        span = self.get_span(obj)
+        if self.spans[id(obj)] == span: return
+        self._delete(obj)
+        self._insert(obj, span)
+
+    def rebuild(self, objs):
+        ''' remove every object and add objs '''
+        self.buckets, self.spans, self.order, self.objects = {}, {}, {}, {}
+        self.version += 1
+        for obj in objs: self.add(obj)
+
+    def _insert(self, obj, span):
+        self.spans[id(obj)] = span
+        for b in range(span[0], span[1] +1): self.buckets.setdefault(b, {})[id(obj)] = obj
+
+    def _delete(self, obj):
+        first, last = self.spans.pop(id(obj))
+        for b in range(first, last +1):
+            bucket = self.buckets[b]
+            del bucket[id(obj)]
+            if not bucket: del self.buckets[b]
+
+    def query_range(self, x1, x2):
+        ''' Returns list of objects whose x extent overlaps x1 to x2 (in pixels, x2 not included) '''
+        found = {}
+        for b in range(int(x1//self.bucket_size), int((x2 -1)//self.bucket_size) +1):
+            for key, obj in self.buckets.get(b, {}).items():
+                if obj.x < x2 and obj.x +obj.width > x1: found[key] = obj
+        for obj in self.query_animals(x1, x2): found[id(obj)] = obj
+        return sorted(found.values(), key=lambda obj: self.order[id(obj)])
+
+    def query_animals(self, x1, x2):
+        ''' Returns list of Animals (not in order) whose x extent overlaps x1 to x2 (see query_range) '''
+        if self.animals == None: return []
+        return [obj for obj in self.animals.query_range(x1, x2) if id(obj) in self.objects]
+
+    def query_point(self, x, y):
+        ''' Returns list of objects containing point (x, y) (world position, in pixels) '''
+        return [obj for obj in self.query_range(x, x +1) if obj.x <= x < obj.x +obj.width and obj.y <= y < obj.y +obj.height]
+
+    def query_overlap(self, rect):
+        ''' Returns list of objects whose rect collides with rect (pygame.Rect) '''
+        return [obj for obj in self.query_range(rect.left, rect.right) if rect.colliderect(obj.rect)]
+
+
+class SweepAndPrune(object):
+    ''' Broadphase collision detection along x. Once a frame, finds every Person and object whose x extents 
+    overlap (within margin pixels) by sweeping over them sorted by x, and sets each Person's contacts 
+    (list of objects, in the order they were added like SpatialIndex queries). Persons check contacts with their rect (narrowphase).
+    Objects are kept sorted between frames, and since they only move a little each frame, sorting is nearly linear.
+    Animals aren't swept, they're found for all Persons with SpatialIndex.query_animals (from arrays). '''
+    def __init__(self, margin=0):
+        self.margin = margin # in pixels, more than Persons and objects move between update and using contacts
+        self.sorted = [] # objects (including Persons, not Animals), sorted by x at the last update
+        self.version = None # SpatialIndex.version at the last update
+
+    def update(self, persons, objects):
+        ''' set contacts for persons (list of Persons)
+        objects - SpatialIndex of persons and the objects they can touch '''
+        if not persons: return
+        if objects.version != self.version: # objects were added or removed
+            self.version = objects.version
+            kept = [o for o in self.sorted if id(o) in objects.spans]
+            kept_ids = {id(o) for o in kept}
+            self.sorted = kept +[o for key,o in objects.objects.items() if key in objects.spans and key not in kept_ids]
+        self.sorted.sort(key=get_x)
+
+        person_ids = {id(p) for p in persons}
+        margin = self.margin/2 # added to both sides of every extent
+        active_persons, active_objects = [], [] # extents that may overlap the next ones
+        for o in self.sorted:
+            left = o.x -margin
+            if id(o) in person_ids:
+                active_objects = [a for a in active_objects if a.x +a.width +margin > left]
+                o.contacts = list(active_objects)
+                active_persons.append(o)
+            else:
+                if active_persons:
+                    active_persons = [p for p in active_persons if p.x +p.width +margin > left]
+                    for p in active_persons: p.contacts.append(o)
+                active_objects.append(o)
+        for p in persons:
+            if p in objects: 
+                p.contacts += objects.query_animals(p.x -self.margin, p.x +p.width +self.margin)
+                p.contacts.sort(key=lambda o: objects.order[id(o)])
+
+def get_x(obj):
+    return obj.x
@@ -0,0 +1,170 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import obj
+import generate
+
+class ChunkStreamer(object):
+    ''' Creates objects for chunks as they come within distance chunks of the camera
+    and writes them back to chunk data (and drops them) when they leave.
+    Moving objects (Animals, Persons, Items, Structures) are written back to the chunk they're in,
+    tile objects (trees, grass, rocks) to the chunk they were created for. '''
+    def __init__(self, distance, hysteresis=1):
+        self.distance = distance # in chunks, chunks within this distance of the camera are loaded
+        self.hysteresis = hysteresis # in chunks, extra distance before loaded chunks are unloaded (so chunks on the edge don't reload every frame)
+        self.loaded = set() # loaded chunk numbers
+        self.center = None # chunk number at the center of the loaded chunks
+
+    def update(self, x):
+        ''' load/unload chunks around x (world position of the camera, in pixels)
+        modifies the object lists in main '''
+        from main import CHUNK_SIZE, chunk_data
+        center = int(x//CHUNK_SIZE)
+        if center == self.center: return
+        self.center = center
+        unload = [c for c in self.loaded if abs(c -center) > self.distance +self.hysteresis]
+        if unload: self.unload_chunks(unload)
+        for chunk in range(center -self.distance, center +self.distance +1):
+            if chunk not in self.loaded and chunk in chunk_data: self.load_chunk(chunk)
+        self.sweep()
+
+    def load_chunk(self, chunk):
+        import main
+        layers = [main.bg_objs, main.interactable_bg_objs, main.playable_objs, main.fg_objs, main.interactable_fg_objs]
+        for layer, new in zip(layers, generate.create_chunk_objects(main.chunk_data, chunk)): 
+            layer.extend(new)
+            if layer is not main.bg_objs and layer is not main.fg_objs:
+                for o in new: 
+                    main.spatial_index.add(o)
+                    main.lights.add(o)
+                    main.animals.add(o)
+                    main.people.add(o)
+        self.loaded.add(chunk)
+        main.chunk_cache.invalidate(chunk)
+        if any(main.chunk_data[chunk][key] for key in ('animals', 'people', 'items')):
+            main.chunk_data.mark_dirty(chunk) # its objects can move to other chunks, so it's saved from the live objects
+
+    def unload_chunks(self, chunks):
+        ''' write objects in chunks back to chunk data and remove them from the object lists '''
+        import main
+        chunks = set(chunks)
+        dropped = set() # ids of objects to remove
+        written = {chunk: self.get_empty_chunk(chunk) for chunk in chunks} # assigned to chunk data once every object is written back
+        for layer in [main.bg_objs, main.interactable_bg_objs, main.playable_objs, main.fg_objs, main.interactable_fg_objs]:
+            for o in layer:
+                chunk = self.get_chunk(o)
+                if chunk in chunks and self.write_back(o, chunk, written[chunk]): dropped.add(id(o))
+        for chunk, data in written.items():
+            for key, value in data.items(): main.chunk_data[chunk][key] = value # unchanged chunks don't become dirty
+        self.drop(dropped)
+        self.loaded -= chunks
+        for chunk in chunks: main.chunk_cache.invalidate(chunk)
+
+    def sweep(self):
+        ''' write back and drop moving objects that have left the loaded chunks (e.g. wandering Animals)
+        they're added to the (unloaded) chunk's data so they're created again when it's loaded '''
+        import main
+        dropped = set()
+        for layer in [main.interactable_bg_objs, main.playable_objs, main.interactable_fg_objs]:
+            for o in layer:
+                chunk = self.get_chunk(o)
+                if o.chunk == None and chunk not in self.loaded and chunk in main.chunk_data \
+                    and self.write_back(o, chunk): dropped.add(id(o))
+        self.drop(dropped)
+
+    def get_chunk(self, o):
+        ''' Returns the chunk an object is written back to '''
+        if o.chunk != None: return o.chunk
+        from main import CHUNK_SIZE
+        return int((o.x +o.width//2)//CHUNK_SIZE)
+
+    def write_back(self, o, chunk, data=None):
+        ''' add object to chunk data (or data, a dict of the chunk's data). Returns True if the object should be dropped '''
+        from main import chunk_data, controller
+        if type(o) == obj.Item and not o.on_ground: return False # held items are saved and dropped with their Person
+        if o is controller.player: return False
+        record = self.get_record(o)
+        if data == None: data = chunk_data[chunk]
+        if record != None: self.add_record(data, *record)
+        if o is controller.selection: controller.deselect()
+        return True
+
+    def get_record(self, o):
+        ''' Returns (chunk data key, record) for saving an object to chunk data, None for objects that aren't saved.
+        tile objects (trees, grass, rocks) are saved as (tile, name), other objects as ('name', x_pos, ...) tuples '''
+        if o.tile != None:
+            if 'wood' in o.tags: return 'trees', (o.tile, o.name)
+            elif 'item' in o.tags: return 'rocks', (o.tile, o.name)
+            return 'grass', (o.tile, o.name)
+        elif type(o) == obj.Animal: return 'animals', (o.name, int(o.x +o.width//2))
+        elif type(o) == obj.Structure:
+            return 'structures', (o.name, int(o.x +o.width//2), {'inventory': dict(o.inventory), 'built': o.built})
+        elif type(o) == obj.Person:
+            item = ''
+            if o.item != None: item = o.item.id
+            return 'people', (o.name, int(o.x), {'inventory': dict(o.inventory), 'health': o.health, \
+                'hunger': o.hunger, 'stamina': o.stamina, 'item': item})
+        elif 'item' in o.tags: return 'items', (o.id, int(o.x))
+        return None
+
+    def add_record(self, data, key, record):
+        ''' add a record (see get_record) to one chunk's data '''
+        if key in ('trees', 'grass', 'rocks'):
+            tiles = data[key]
+            tiles[record[0]] = record[1]
+            data[key] = tiles # chunk data returns a copy of tile lists (see chunks.ChunkStore)
+        else: data[key] = list(data[key]) +[record] # assigned so chunk data knows the chunk changed (missing lists read as a tuple)
+
+    def get_empty_chunk(self, chunk):
+        ''' Returns a copy of a loaded chunk's data without its objects (for writing every object back) '''
+        from main import chunk_data
+        data = chunk_data[chunk].copy()
+        for key in ('trees', 'grass', 'rocks'): data[key] = ['' for tile in data[key]]
+        for key in ('animals', 'structures', 'people', 'items'): data[key] = []
+        return data
+
+    def get_object_chunks(self):
+        ''' Returns set of chunks with Animals or Persons in them (objects that change every tick) '''
+        import main
+        return {self.get_chunk(o) for o in main.interactable_fg_objs +main.playable_objs if type(o) in (obj.Animal, obj.Person)}
+
+    def snapshot(self, chunks=None):
+        ''' Returns {chunk_number : {<chunk data>}} for chunks (DEFAULT: loaded chunks and chunks with objects in them), 
+        with every object (including the player) written back as if its chunk were unloaded. 
+        Nothing is dropped (for saving) '''
+        import main
+        snapshot = {}
+        for chunk in self.loaded:
+            if chunks == None or chunk in chunks: snapshot[chunk] = self.get_empty_chunk(chunk)
+        for layer in [main.bg_objs, main.interactable_bg_objs, main.playable_objs, main.fg_objs, main.interactable_fg_objs]:
+            for o in layer:
+                if type(o) == obj.Item and not o.on_ground: continue # saved with their Person
+                chunk = self.get_chunk(o)
+                if chunk not in main.chunk_data or (chunks != None and chunk not in chunks): continue
+                record = self.get_record(o)
+                if record == None: continue
+                if chunk not in snapshot: snapshot[chunk] = main.chunk_data[chunk].copy()
+                self.add_record(snapshot[chunk], *record)
+        if chunks != None: 
+            for chunk in chunks: # chunks without objects (e.g., all of their objects left)
+                if chunk not in snapshot and chunk in main.chunk_data: snapshot[chunk] = main.chunk_data[chunk].copy()
+        return snapshot
+
+    def drop(self, dropped):
+        ''' remove objects (by id) from the object lists in main '''
+        if not dropped: return
+        import main
+        for p in main.playable_objs:
+            if p.item != None and id(p) in dropped: dropped.add(id(p.item)) # held items are dropped with their Person
+            if p.pursue_obj != None and id(p.pursue_obj) in dropped and id(p) not in dropped:
+                p.state = 'idle' # stop pursuing objects that were unloaded
+                p.animated = False
+                p.pursue_obj = None
+        for layer in [main.bg_objs, main.interactable_bg_objs, main.playable_objs, main.fg_objs, main.interactable_fg_objs]:
+            for o in layer:
+                if id(o) in dropped: 
+                    main.spatial_index.remove(o)
+                    main.lights.remove(o)
+                    main.animals.remove(o)
+                    main.people.remove(o)
+            layer[:] = [o for o in layer if id(o) not in dropped]
@@ -1,13 +1,15 @@
 # Author: Griffin Leonard
 # Created: 11/6/22
 
+import os
 import json
 import pygame
 
 def save_json(name, data):
-    ''' Save data json. Returns nothing '''
-    with open(name+'.txt','w') as file:
+    ''' Save data json (replaces the file atomically, so it's never half-written). Returns nothing '''
+    with open(name+'.txt.tmp','w') as file:
         json.dump(data,file)
+    os.replace(name+'.txt.tmp', name+'.txt')
 
 def load_json(name):
     ''' Load json and return datastructure '''
@@ -31,6 +33,11 @@ def zoom_scale(zoom, pos):
     else: return (pos[0] +(SCREEN_WIDTH//2 -pos[0])*(1 -2**abs(zoom-1)), pos[1] +(GROUND_Y -pos[1])*(1 -2**abs(zoom-1)))
     # TODO: fix scaling when zoom <1
 
+def get_zoom_level(zoom):
+    ''' Returns the zoom level (in main.ZOOM_LEVELS) nearest to zoom (scale factor) '''
+    from main import ZOOM_LEVELS
+    return min(ZOOM_LEVELS, key=lambda level: abs(level -zoom))
+
 def zoom_transform(surf_size, pos):
     ''' Center position of object on new screen size (does not scale object)
     args:
@@ -44,4 +51,20 @@ def flip_img(img, axis=0):
     ''' axis - x=0, y=1, x&y=2 '''
     if axis == 0: return pygame.transform.flip(img,1,0)
     elif axis == 1: return pygame.transform.flip(img,0,1)
-    return pygame.transform.flip(img,1,1)   
\ No newline at end of file
+    return pygame.transform.flip(img,1,1)   
+
+class Field(object):
+    ''' Object attribute stored in a system's arrays (e.g., fauna.AnimalSystem) while the object is added to one
+    (its system and slot attributes are set), and on the object otherwise. Systems have get(slot, name) and
+    set(slot, name, value) '''
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj == None: return self
+        if obj.system == None: return obj.__dict__['_'+self.name]
+        return obj.system.get(obj.slot, self.name)
+
+    def __set__(self, obj, value):
+        if obj.system == None: obj.__dict__['_'+self.name] = value
+        else: obj.system.set(obj.slot, self.name, value)
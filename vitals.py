@@ -0,0 +1,119 @@
+# Author: Griffin Leonard
+# Created: 10/18/26
+
+import numpy
+
+GAITS = [None, 'idle', 'walk', 'run'] # Person.gait, stored as index (None: not moved by a player this tick)
+FIELDS = {'health': numpy.float64, 'hunger': numpy.int64, 'max_hunger': numpy.int64, 'stamina': numpy.float64,
+    'max_stamina': numpy.float64, 'gait': numpy.int8} # stored for each Person
+MIN_CAPACITY = 16 # Persons the arrays hold before growing
+HUNGER_RATES = numpy.array([0, 0, 1, 2]) # hunger added each tick for each gait (on top of 1, hungry faster when walking or running)
+RUN_STAMINA = 1 # stamina used each tick running (on top of stamina_regen['walk'])
+
+class VitalsSystem(object):
+    ''' Every Person's vital stats (see FIELDS) in arrays (struct of arrays), advanced for all Persons at once
+    each tick with numpy (see update). Persons (obj.Person) read and write their slot of the arrays (utility.Field)
+    and handle input and tasks themselves, setting gait when a player moves them. Persons must be added and removed
+    like spatial.SpatialIndex's objects.
+    each tick:
+        hunger - goes up by 1 until max_hunger, then health goes down (quicker the hungrier),
+            and by HUNGER_RATES for gait
+        stamina - goes up by stamina_regen for gait (idle, walk) or down running, capped at max_stamina
+        health - Persons below 0 die (see update) '''
+    def __init__(self):
+        self.arrays = {name: numpy.zeros(0, dtype) for name, dtype in FIELDS.items()}
+        self.rates = numpy.zeros((0, len(GAITS))) # stamina added each tick for each gait (see get_rates)
+        self.people = [] # maps slot to Person (None for unused slots, which never starve)
+        self.free = [] # unused slots
+        self.count = 0 # number of Persons
+        self.grow(MIN_CAPACITY)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, obj):
+        ''' add obj if it's a Person (its vital stats are moved into the arrays) '''
+        from obj import Person
+        if type(obj) != Person or obj.system != None: return
+        if not self.free: self.grow(len(self.people)*2)
+        slot = self.free.pop()
+        values = {name: obj.__dict__.pop('_'+name) for name in FIELDS}
+        obj.system, obj.slot = self, slot
+        for name, value in values.items(): self.set(slot, name, value)
+        self.rates[slot] = get_rates(obj)
+        self.people[slot] = obj
+        self.count += 1
+
+    def remove(self, obj):
+        ''' remove obj (its vital stats are moved back onto it) '''
+        if getattr(obj, 'system', None) is not self: return
+        slot = obj.slot
+        values = {name: self.get(slot, name) for name in FIELDS}
+        obj.system, obj.slot = None, None
+        for name, value in values.items(): setattr(obj, name, value)
+        self.clear(slot)
+        self.people[slot] = None
+        self.free.append(slot)
+        self.count -= 1
+
+    def rebuild(self, objs):
+        ''' remove every Person and add those in objs '''
+        for person in self.people:
+            if person != None: self.remove(person)
+        for obj in objs: self.add(obj)
+
+    def grow(self, capacity):
+        ''' make room for capacity Persons '''
+        old = len(self.people)
+        for name in FIELDS: self.arrays[name] = numpy.resize(self.arrays[name], capacity)
+        self.rates = numpy.resize(self.rates, (capacity, len(GAITS)))
+        self.index = numpy.arange(capacity) # slots, for indexing rates by gait
+        self.people += [None]*(capacity -old)
+        self.free += range(capacity -1, old -1, -1) # lowest slots used first
+        self.clear(slice(old, capacity))
+
+    def clear(self, slots):
+        ''' make slots unused (they never starve or die, see update) '''
+        self.arrays['health'][slots] = numpy.inf
+        self.arrays['hunger'][slots] = 0
+        self.arrays['max_hunger'][slots] = numpy.iinfo(numpy.int64).max
+        self.arrays['gait'][slots] = 0
+        self.rates[slots] = 0
+
+    def get(self, slot, name):
+        ''' Returns a Person's vital stat (see FIELDS) as Person attributes are (e.g., gait as a string) '''
+        value = self.arrays[name][slot]
+        if name == 'gait': return GAITS[value]
+        elif name in ('hunger', 'max_hunger'): return int(value)
+        return float(value)
+
+    def set(self, slot, name, value):
+        if name == 'gait': value = GAITS.index(value)
+        self.arrays[name][slot] = value
+
+    def update(self):
+        ''' advance every Person's vital stats one tick
+        Returns list of Persons who died (health below 0, see obj.Person.die) '''
+        if not self.count: return []
+        health, hunger, max_hunger = self.arrays['health'], self.arrays['hunger'], self.arrays['max_hunger']
+        stamina, gait = self.arrays['stamina'], self.arrays['gait']
+
+        # hunger, decrease health by 1 each second at max hunger (quicker if walking or running)
+        hungry = hunger < max_hunger
+        if not hungry.all():
+            from main import FPS
+            numpy.subtract(health, (hunger -max_hunger -1)/FPS, out=health, where=~hungry)
+        hunger += hungry
+
+        # stamina and hunger for gait (only a player's is set)
+        if gait.any():
+            hunger += HUNGER_RATES[gait]
+            stamina += self.rates[self.index, gait]
+            numpy.minimum(stamina, self.arrays['max_stamina'], out=stamina) # cap at maximum (so we don't have to elsewhere)
+            gait[:] = 0 # set again by input next tick
+
+        return [self.people[i] for i in (health < 0).nonzero()[0]]
+
+def get_rates(person):
+    ''' Returns list of stamina a Person regains each tick for each gait (see GAITS), from its stamina_regen '''
+    return [0, person.stamina_regen['idle'], person.stamina_regen['walk'], person.stamina_regen['walk'] -RUN_STAMINA]